@@ -0,0 +1,129 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+from database import DatabaseManager
+from models import Credential
+
+class AsyncDatabaseManager:
+    """Fachada asyncio sobre DatabaseManager.
+
+    Las lecturas se ejecutan en un pool de hilos con concurrencia limitada,
+    cada hilo con su propia conexión (WAL permite lecturas concurrentes).
+    Las escrituras se serializan en un único hilo escritor, que por lo tanto
+    usa siempre la misma conexión. Cancelar una operación en curso
+    interrumpe la sentencia SQLite que se está ejecutando.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, max_readers: int = 4):
+        self.db_manager = db_manager
+        self.max_readers = max_readers
+        self._read_executor = ThreadPoolExecutor(max_workers=max_readers, thread_name_prefix="vault-reader")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault-writer")
+        self._read_semaphore: Optional[asyncio.Semaphore] = None
+
+    async def _run(self, executor: ThreadPoolExecutor, method: Callable, *args, **kwargs):
+        """Ejecuta un método bloqueante en el ejecutor indicado, admitiendo cancelación."""
+        loop = asyncio.get_running_loop()
+        # La conexión del hilo solo se interrumpe mientras ejecuta este método;
+        # después puede estar atendiendo la consulta de otra corrutina
+        lock = threading.Lock()
+        state = {'conn': None, 'executing': False}
+
+        def call():
+            conn = self.db_manager.get_connection()
+            with lock:
+                state['conn'] = conn
+                state['executing'] = True
+            try:
+                return method(*args, **kwargs)
+            finally:
+                with lock:
+                    state['executing'] = False
+
+        future = loop.run_in_executor(executor, call)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Si la operación sigue en curso, se interrumpe la sentencia que ejecuta
+            with lock:
+                if state['executing']:
+                    state['conn'].interrupt()
+            raise
+
+    async def _read(self, method: Callable, *args, **kwargs):
+        """Ejecuta una lectura respetando el límite de lecturas concurrentes."""
+        if self._read_semaphore is None:
+            self._read_semaphore = asyncio.Semaphore(self.max_readers)
+        async with self._read_semaphore:
+            return await self._run(self._read_executor, method, *args, **kwargs)
+
+    async def _write(self, method: Callable, *args, **kwargs):
+        """Ejecuta una escritura en el hilo escritor único."""
+        return await self._run(self._write_executor, method, *args, **kwargs)
+
+    async def add_credential(self, website: str, username: str, password: str) -> bool:
+        """Agrega una nueva credencial."""
+        return await self._write(self.db_manager.add_credential, website, username, password)
+
+    async def update_credential(self, credential_id: int, website: str, username: str, password: str) -> bool:
+        """Actualiza una credencial existente."""
+        return await self._write(self.db_manager.update_credential, credential_id, website, username, password)
+
+    async def delete_credential(self, credential_id: int) -> bool:
+        """Elimina una credencial."""
+        return await self._write(self.db_manager.delete_credential, credential_id)
+
+    async def add_credentials_bulk(self, credentials: Iterable[Dict]) -> Dict:
+        """Agrega muchas credenciales en una sola transacción."""
+        return await self._write(self.db_manager.add_credentials_bulk, list(credentials))
+
+    async def update_credentials_bulk(self, credentials: Iterable[Dict]) -> Dict:
+        """Actualiza muchas credenciales en una sola transacción."""
+        return await self._write(self.db_manager.update_credentials_bulk, list(credentials))
+
+    async def delete_credentials_bulk(self, credential_ids: Iterable[int]) -> Dict:
+        """Elimina muchas credenciales en una sola transacción."""
+        return await self._write(self.db_manager.delete_credentials_bulk, list(credential_ids))
+
+    async def get_credentials(self) -> List[Credential]:
+        """Obtiene todas las credenciales con sus contraseñas desencriptadas."""
+        return await self._read(self.db_manager.get_credentials)
+
+    async def list_credentials(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Credential]:
+        """Obtiene los metadatos de las credenciales sin desencriptar contraseñas."""
+        return await self._read(self.db_manager.list_credentials, query, limit)
+
+    async def search_credentials(self, query: str, limit: Optional[int] = None) -> List[Credential]:
+        """Busca credenciales que coincidan con la consulta."""
+        return await self._read(self.db_manager.search_credentials, query, limit)
+
+    async def get_credentials_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        order_by: str = 'id'
+    ) -> List[Credential]:
+        """Obtiene una página de metadatos usando paginación por clave."""
+        return await self._read(self.db_manager.get_credentials_page, after_id, limit, order_by)
+
+    async def get_changes_since(self, watermark: int = 0) -> Dict:
+        """Obtiene los cambios posteriores a una marca de agua."""
+        return await self._read(self.db_manager.get_changes_since, watermark)
+
+    async def reveal_password(self, credential_id: int) -> Optional[str]:
+        """Desencripta la contraseña de una sola credencial."""
+        return await self._read(self.db_manager.reveal_password, credential_id)
+
+    async def close(self) -> None:
+        """Espera a las operaciones pendientes y cierra la base de datos."""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._write_executor.shutdown, True)
+        await loop.run_in_executor(None, self._read_executor.shutdown, True)
+        self.db_manager.close()
+
+    async def __aenter__(self) -> "AsyncDatabaseManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
@@ -1,12 +1,26 @@
+import glob
+import hashlib
+import hmac
 import json
 import os
 from typing import Optional, Dict
 from crypto_utils import CryptoManager
+from file_utils import atomic_write
+from database import DatabaseManager
+from kdf import LEGACY_PARAMS, calibrate, derive_key
+from vault import PasswordVault
 
 class AuthManager:
-    def __init__(self, crypto_manager: CryptoManager):
+    def __init__(self, crypto_manager: CryptoManager, kdf_algorithm: str = "scrypt", kdf_target_seconds: float = 0.5):
         self.crypto_manager = crypto_manager
+        # Derivación de clave para contraseñas nuevas, calibrada a este tiempo de desbloqueo
+        self.kdf_algorithm = kdf_algorithm
+        self.kdf_target_seconds = kdf_target_seconds
         self.auth_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "auth.json")
+        # Misma ruta por defecto que DatabaseManager
+        self.db_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "vault.db")
+        # Misma ruta por defecto que PasswordVault
+        self.vault_file = os.path.join("data", "vault.enc")
         self.max_login_attempts = 3
         self.current_attempts = 0
         self.user_data: Optional[Dict] = None
@@ -22,10 +36,80 @@ class AuthManager:
             self.user_data = None
 
     def save_user_data(self) -> None:
-        """Guarda los datos del usuario en el archivo."""
-        os.makedirs(os.path.dirname(self.auth_file), exist_ok=True)
-        with open(self.auth_file, "w") as f:
-            json.dump(self.user_data, f)
+        """Guarda los datos del usuario en el archivo de forma atómica."""
+        atomic_write(self.auth_file, json.dumps(self.user_data).encode())
+
+    @staticmethod
+    def _key_verifier(key: bytes) -> str:
+        """Valor derivado de la clave que permite comprobarla sin guardarla."""
+        return hmac.new(key, b"securevault-key-verifier", hashlib.sha256).hexdigest()
+
+    def _wrap_data_key(self, master_password: str, data_key: bytes) -> Dict:
+        """Envuelve la clave de datos con una clave maestra derivada con sal y parámetros nuevos."""
+        params = calibrate(self.kdf_algorithm, self.kdf_target_seconds)
+        master_key = derive_key(master_password, params)
+        return {"kdf": params, "wrapped_key": self.crypto_manager.wrap_key(master_key, data_key)}
+
+    def _set_key_data(self, key_data: Dict) -> None:
+        """Reemplaza los datos de la clave en user_data, descartando formatos anteriores."""
+        for field in ("master_password_hash", "key_verifier", "kdf", "wrapped_key"):
+            self.user_data.pop(field, None)
+        self.user_data.update(key_data)
+
+    def _unlock_key(self, master_password: str) -> Optional[bytes]:
+        """Deriva la clave maestra una sola vez y devuelve la clave de datos si es correcta.
+
+        Las credenciales se encriptan con una clave de datos aleatoria que
+        solo se guarda envuelta por la clave maestra. En las cuentas
+        anteriores a ese esquema se devuelve la clave con la que están
+        encriptados sus datos, derivada directamente de la contraseña
+        (SHA-256 sin sal, o KDF sin envoltura); login() la reemplaza.
+        """
+        if "wrapped_key" in self.user_data:
+            master_key = derive_key(master_password, self.user_data["kdf"])
+            return self.crypto_manager.unwrap_key(master_key, self.user_data["wrapped_key"])
+        if "kdf" not in self.user_data:
+            if not self.crypto_manager.verify_password(master_password, self.user_data["master_password_hash"]):
+                return None
+            return derive_key(master_password, LEGACY_PARAMS)
+        key = derive_key(master_password, self.user_data["kdf"])
+        if not hmac.compare_digest(self._key_verifier(key), self.user_data["key_verifier"]):
+            return None
+        return key
+
+    def _upgrade_legacy_key(self, master_password: str, legacy_key: bytes) -> bytes:
+        """Pasa una cuenta antigua a una clave de datos aleatoria y re-encripta sus datos.
+
+        La clave nueva se guarda envuelta antes de re-encriptar, junto con
+        los parámetros de la clave anterior (previous_kdf), para que una
+        re-encriptación interrumpida se complete en el siguiente inicio de
+        sesión. Devuelve la clave de datos nueva.
+        """
+        previous_kdf = self.user_data.get("kdf", LEGACY_PARAMS)
+        data_key = os.urandom(32)
+        self._set_key_data(self._wrap_data_key(master_password, data_key))
+        self.user_data["previous_kdf"] = previous_kdf
+        self.save_user_data()
+        self._finish_reencryption(legacy_key, data_key)
+        return data_key
+
+    def _finish_reencryption(self, previous_key: bytes, data_key: bytes) -> None:
+        """Re-encripta la base de datos y el vault con la clave de datos y quita previous_kdf."""
+        previous = CryptoManager()
+        previous.set_key(previous_key)
+        current = CryptoManager()
+        current.set_key(data_key)
+        if os.path.exists(self.db_file):
+            db_manager = DatabaseManager(previous, self.db_file)
+            try:
+                db_manager.reencrypt(current)
+            finally:
+                db_manager.close()
+        vault = PasswordVault(previous, self.vault_file, write_window=0)
+        if vault.has_data_for_key():
+            vault.reencrypt(current)
+        del self.user_data["previous_kdf"]
+        self.save_user_data()
 
     def register_user(self, master_password: str) -> bool:
         """Registra un nuevo usuario con la contraseña maestra."""
@@ -36,12 +120,14 @@ class AuthManager:
         if password_strength["score"] < 3:
             raise ValueError("La contraseña maestra es demasiado débil")
 
+        data_key = os.urandom(32)
         self.user_data = {
-            "master_password_hash": self.crypto_manager.hash_password(master_password),
+            **self._wrap_data_key(master_password, data_key),
             "locked": False,
             "login_attempts": 0
         }
         self.save_user_data()
+        self.crypto_manager.set_key(data_key)
         return True
 
     def login(self, master_password: str) -> bool:
@@ -54,10 +140,17 @@ class AuthManager:
         if self.user_data["locked"]:
             raise ValueError("La cuenta está bloqueada por múltiples intentos fallidos")
 
-        if self.crypto_manager.verify_password(master_password, self.user_data["master_password_hash"]):
+        data_key = self._unlock_key(master_password)
+        if data_key is not None:
             self.user_data["login_attempts"] = 0
             self.save_user_data()
-            self.crypto_manager.initialize_encryption(master_password)
+            if "wrapped_key" not in self.user_data:
+                # Cuenta antigua: sus datos pasan a una clave de datos aleatoria
+                data_key = self._upgrade_legacy_key(master_password, data_key)
+            elif "previous_kdf" in self.user_data:
+                # Re-encriptación interrumpida en un inicio de sesión anterior
+                self._finish_reencryption(derive_key(master_password, self.user_data["previous_kdf"]), data_key)
+            self.crypto_manager.set_key(data_key)
             return True
 
         self.user_data["login_attempts"] += 1
@@ -71,7 +164,7 @@ class AuthManager:
         if not self.user_data or not self.user_data["locked"]:
             return False
 
-        if self.crypto_manager.verify_password(master_password, self.user_data["master_password_hash"]):
+        if self._unlock_key(master_password) is not None:
             self.user_data["locked"] = False
             self.user_data["login_attempts"] = 0
             self.save_user_data()
@@ -79,18 +172,26 @@ class AuthManager:
         return False
 
     def change_master_password(self, current_password: str, new_password: str) -> bool:
-        """Cambia la contraseña maestra."""
+        """Cambia la contraseña maestra.
+
+        Solo se vuelve a envolver la clave de datos (32 bytes) con la nueva
+        contraseña; las credenciales no se reencriptan.
+        """
         if not self.user_data:
             return False
 
-        if not self.crypto_manager.verify_password(current_password, self.user_data["master_password_hash"]):
+        if "previous_kdf" in self.user_data:
+            raise ValueError("Inicia sesión de nuevo para terminar de re-encriptar los datos")
+
+        data_key = self._unlock_key(current_password)
+        if data_key is None:
             return False
 
         password_strength = self.crypto_manager.check_password_strength(new_password)
         if password_strength["score"] < 3:
             raise ValueError("La nueva contraseña maestra es demasiado débil")
 
-        self.user_data["master_password_hash"] = self.crypto_manager.hash_password(new_password)
+        self._set_key_data(self._wrap_data_key(new_password, data_key))
         self.save_user_data()
         return True
 
@@ -102,13 +203,19 @@ class AuthManager:
             raise ValueError("La nueva contraseña maestra es demasiado débil")
 
         # Limpiar archivos existentes
-        vault_file = os.path.join("data", "vault.enc")
-        if os.path.exists(vault_file):
-            os.remove(vault_file)
-
-        # Crear nuevos datos de usuario
+        # Incluye el registro de mutaciones y los fragmentos del vault
+        for path in [self.vault_file] + glob.glob(self.vault_file + ".*"):
+            if os.path.exists(path):
+                os.remove(path)
+        # La base de datos queda encriptada con la clave de datos anterior
+        for path in (self.db_file, self.db_file + "-wal", self.db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+        # Crear nuevos datos de usuario con una clave de datos nueva
+        data_key = os.urandom(32)
         self.user_data = {
-            "master_password_hash": self.crypto_manager.hash_password(new_password),
+            **self._wrap_data_key(new_password, data_key),
             "locked": False,
             "login_attempts": 0
         }
@@ -116,5 +223,5 @@ class AuthManager:
         # Guardar los nuevos datos
         self.save_user_data()
 
-        # Inicializar la encriptación con la nueva contraseña
-        self.crypto_manager.initialize_encryption(new_password) 
\ No newline at end of file
+        # Inicializar la encriptación con la nueva clave de datos
+        self.crypto_manager.set_key(data_key) 
\ No newline at end of file
@@ -1,22 +1,98 @@
 import base64
 import hashlib
+import hmac
+import os
+import struct
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
-from typing import Union
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+from kdf import LEGACY_PARAMS, derive_key
+
+# Formato contenedor por bloques: MAGIC + versión + flags + tamaño de bloque + sal
+STREAM_MAGIC = b"SVLT"
+STREAM_VERSION = 1
+STREAM_HEADER = struct.Struct(">4sBBI16s")
+# Cada bloque encriptado lleva una etiqueta de autenticación GCM de 16 bytes
+STREAM_TAG_SIZE = 16
+# Datos asociados al envolver la clave de datos con la clave maestra
+KEY_WRAP_AAD = b"securevault-data-key"
+
+
+def _encrypt_chunk(key: bytes, items: List[str]) -> List[bytes]:
+    """Encripta un bloque de cadenas con una instancia Fernet propia del worker."""
+    fernet = Fernet(key)
+    return [fernet.encrypt(item.encode()) for item in items]
+
+
+def _decrypt_chunk(key: bytes, items: List[bytes]) -> List[Optional[str]]:
+    """Desencripta un bloque; los elementos inválidos se devuelven como None."""
+    fernet = Fernet(key)
+    results = []
+    for item in items:
+        try:
+            results.append(fernet.decrypt(item).decode())
+        except Exception:
+            results.append(None)
+    return results
+
 
 class CryptoManager:
-    def __init__(self):
+    # Modos de ejecución admitidos por encrypt_many/decrypt_many
+    EXECUTORS = ("serial", "thread", "process")
+
+    def __init__(self, executor: str = "serial", max_workers: Optional[int] = None, chunk_size: int = 256):
         self.fernet = None
+        # Clave inmutable: los workers crean su propio Fernet a partir de ella
+        self._key: Optional[bytes] = None
+        # Subclave para índices ciegos (HMAC), distinta de la clave de cifrado
+        self._blind_key: Optional[bytes] = None
+        # Subclave para el formato contenedor por bloques (AES-GCM)
+        self._stream_key: Optional[bytes] = None
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Ejecutor no soportado: {executor}")
+        self.executor = executor
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._pool: Optional[Executor] = None
+
+    def generate_key_from_password(self, master_password: str, kdf_params: Optional[Dict] = None) -> bytes:
+        """Genera una clave Fernet a partir de la contraseña maestra.
 
-    def generate_key_from_password(self, master_password: str) -> bytes:
-        """Genera una clave Fernet a partir de la contraseña maestra."""
-        # Usa SHA-256 para crear una clave de 32 bytes a partir de la contraseña
-        key = hashlib.sha256(master_password.encode()).digest()
+        Sin kdf_params usa la derivación original (SHA-256 sin sal).
+        """
+        key = derive_key(master_password, kdf_params or LEGACY_PARAMS)
         # Codifica la clave en base64 (requerido por Fernet)
         return base64.urlsafe_b64encode(key)
 
-    def initialize_encryption(self, master_password: str) -> None:
+    def initialize_encryption(self, master_password: str, kdf_params: Optional[Dict] = None) -> None:
         """Inicializa el sistema de encriptación con la contraseña maestra."""
-        key = self.generate_key_from_password(master_password)
+        self._set_fernet_key(self.generate_key_from_password(master_password, kdf_params))
+
+    def set_key(self, key: bytes) -> None:
+        """Inicializa la encriptación con una clave de 32 bytes ya derivada."""
+        self._set_fernet_key(base64.urlsafe_b64encode(key))
+
+    @staticmethod
+    def wrap_key(wrapping_key: bytes, key: bytes) -> str:
+        """Envuelve (encripta) una clave con AES-GCM; devuelve nonce + texto cifrado en base64."""
+        nonce = os.urandom(12)
+        return base64.b64encode(nonce + AESGCM(wrapping_key).encrypt(nonce, key, KEY_WRAP_AAD)).decode()
+
+    @staticmethod
+    def unwrap_key(wrapping_key: bytes, wrapped: str) -> Optional[bytes]:
+        """Recupera una clave envuelta; None si la clave de envoltura no es la correcta."""
+        data = base64.b64decode(wrapped)
+        try:
+            return AESGCM(wrapping_key).decrypt(data[:12], data[12:], KEY_WRAP_AAD)
+        except InvalidTag:
+            return None
+
+    def _set_fernet_key(self, key: bytes) -> None:
+        self._key = key
+        self._blind_key = hmac.new(key, b"securevault-blind-index", hashlib.sha256).digest()
+        self._stream_key = hmac.new(key, b"securevault-stream", hashlib.sha256).digest()
         self.fernet = Fernet(key)
 
     def encrypt_data(self, data: str) -> bytes:
@@ -31,8 +107,121 @@ class CryptoManager:
             raise ValueError("Encryption not initialized")
         return self.fernet.decrypt(encrypted_data).decode()
 
+    def blind_index(self, value: str) -> str:
+        """Calcula un índice ciego (HMAC-SHA256 truncado, en hexadecimal) de un valor."""
+        if not self._blind_key:
+            raise ValueError("Encryption not initialized")
+        return hmac.new(self._blind_key, value.encode(), hashlib.sha256).hexdigest()[:32]
+
+    @staticmethod
+    def is_stream(header: bytes) -> bool:
+        """Indica si unos bytes iniciales corresponden al formato contenedor por bloques."""
+        return header[:len(STREAM_MAGIC)] == STREAM_MAGIC
+
+    @staticmethod
+    def stream_flags(header: bytes) -> int:
+        """Devuelve los flags de la cabecera de un archivo en formato contenedor."""
+        if len(header) < STREAM_HEADER.size:
+            raise ValueError("Cabecera de vault incompleta")
+        return STREAM_HEADER.unpack(header[:STREAM_HEADER.size])[2]
+
+    @staticmethod
+    def _stream_nonce(counter: int, last: bool) -> bytes:
+        """Nonce de 12 bytes: número de bloque (11 bytes) + marca de último bloque."""
+        return counter.to_bytes(11, "big") + (b"\x01" if last else b"\x00")
+
+    def _stream_cipher(self, salt: bytes) -> AESGCM:
+        """Cifrador AES-GCM con una clave propia del archivo, derivada de su sal."""
+        if not self._stream_key:
+            raise ValueError("Encryption not initialized")
+        return AESGCM(hmac.new(self._stream_key, salt, hashlib.sha256).digest())
+
+    def encrypt_stream(self, pieces: Iterable[bytes], chunk_size: int = 64 * 1024, flags: int = 0) -> Iterator[bytes]:
+        """Encripta un flujo de bytes en bloques autenticados de tamaño fijo.
+
+        Produce primero la cabecera y luego cada bloque encriptado. Cada
+        bloque se autentica con su número de secuencia y la cabecera, y el
+        último lleva una marca propia, de modo que reordenar, truncar o
+        agregar bloques se detecta al desencriptar. El último bloque siempre
+        es más corto que chunk_size (puede quedar vacío).
+        """
+        salt = os.urandom(16)
+        header = STREAM_HEADER.pack(STREAM_MAGIC, STREAM_VERSION, flags, chunk_size, salt)
+        cipher = self._stream_cipher(salt)
+        yield header
+        buffer = bytearray()
+        counter = 0
+        for piece in pieces:
+            buffer += piece
+            while len(buffer) >= chunk_size:
+                yield cipher.encrypt(self._stream_nonce(counter, False), bytes(buffer[:chunk_size]), header)
+                del buffer[:chunk_size]
+                counter += 1
+        yield cipher.encrypt(self._stream_nonce(counter, True), bytes(buffer), header)
+
+    def decrypt_stream(self, source: BinaryIO) -> Iterator[bytes]:
+        """Desencripta un flujo en formato contenedor, bloque a bloque."""
+        header = source.read(STREAM_HEADER.size)
+        if len(header) < STREAM_HEADER.size or not self.is_stream(header):
+            raise ValueError("Formato de vault no reconocido")
+        _, version, _, chunk_size, salt = STREAM_HEADER.unpack(header)
+        if version != STREAM_VERSION:
+            raise ValueError(f"Versión de vault no soportada: {version}")
+        cipher = self._stream_cipher(salt)
+        block_size = chunk_size + STREAM_TAG_SIZE
+        counter = 0
+        while True:
+            block = source.read(block_size)
+            last = len(block) < block_size
+            try:
+                yield cipher.decrypt(self._stream_nonce(counter, last), block, header)
+            except InvalidTag:
+                raise ValueError("Vault dañado, truncado o encriptado con otra clave")
+            if last:
+                if source.read(1):
+                    raise ValueError("Datos inesperados al final del vault")
+                return
+            counter += 1
+
+    def _get_pool(self) -> Optional[Executor]:
+        """Devuelve el pool de workers configurado, creándolo la primera vez."""
+        if self.executor == "serial":
+            return None
+        if self._pool is None:
+            if self.executor == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def shutdown_executor(self) -> None:
+        """Libera el pool de workers, si existe."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def _run_chunked(self, func, items: list) -> list:
+        """Reparte los elementos en bloques y los procesa con el ejecutor configurado."""
+        if not self._key:
+            raise ValueError("Encryption not initialized")
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        pool = self._get_pool() if len(chunks) > 1 else None
+        if pool is None:
+            results = [func(self._key, chunk) for chunk in chunks]
+        else:
+            results = pool.map(func, [self._key] * len(chunks), chunks)
+        return [item for chunk in results for item in chunk]
+
+    def encrypt_many(self, data: Iterable[str]) -> List[bytes]:
+        """Encripta muchas cadenas, en paralelo si hay un ejecutor configurado."""
+        return self._run_chunked(_encrypt_chunk, list(data))
+
+    def decrypt_many(self, encrypted_data: Iterable[bytes]) -> List[Optional[str]]:
+        """Desencripta muchos valores; los que no se pueden desencriptar quedan como None."""
+        return self._run_chunked(_decrypt_chunk, list(encrypted_data))
+
     def hash_password(self, password: str) -> str:
-        """Genera un hash seguro de la contraseña."""
+        """Hash SHA-256 de la contraseña (formato antiguo de auth.json)."""
         return hashlib.sha256(password.encode()).hexdigest()
 
     def verify_password(self, password: str, hashed_password: str) -> bool:
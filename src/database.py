@@ -1,35 +1,702 @@
+import json
 import sqlite3
 import os
-from typing import List, Dict, Optional
+import re
+import threading
+import time
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Callable, List, Dict, Optional, Iterable, Iterator, Tuple
 from crypto_utils import CryptoManager
+from models import Credential
+from secret_cache import SecretCache
+
+
+def normalize_host(website: str) -> str:
+    """Normaliza un sitio web a su host: minúsculas, sin esquema, ruta, puerto ni 'www.'."""
+    host = website.strip().lower()
+    host = re.sub(r'^[a-z][a-z0-9+.-]*://', '', host)
+    host = re.split(r'[/?#]', host, maxsplit=1)[0]
+    host = host.rsplit('@', 1)[-1].split(':', 1)[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return host
+
+
+def normalize_username(username: str) -> str:
+    """Normaliza un nombre de usuario para búsquedas por igualdad."""
+    return username.strip().lower()
+
+
+# Versión de los tokens del índice ciego; al cambiarla se reconstruye el índice
+BLIND_INDEX_VERSION = "2"
+
+
+def metadata_tokens(website: str, username: str) -> List[str]:
+    """Genera los tokens en claro que se indexan de forma ciega para una credencial.
+
+    Incluye el host exacto y cada dominio padre (mail.google.com también
+    genera google.com), el usuario normalizado, las palabras de ambos
+    campos de al menos tres caracteres y los prefijos de esas palabras
+    desde tres caracteres (goo, goog, googl para google).
+    """
+    host = normalize_host(website)
+    user = normalize_username(username)
+    tokens = {f"host:{host}", f"user:{user}"}
+    labels = host.split('.')
+    for i in range(1, len(labels) - 1):
+        tokens.add(f"host:{'.'.join(labels[i:])}")
+    for word in re.split(r'[^0-9a-z]+', f"{host} {user}"):
+        if len(word) >= 3:
+            tokens.add(f"word:{word}")
+            for end in range(3, len(word)):
+                tokens.add(f"prefix:{word[:end]}")
+    return sorted(tokens)
+
+
+def _looks_like_host(value: str) -> bool:
+    """Indica si una consulta puede ser un sitio web (no un correo ni varias palabras)."""
+    return '@' not in value and not re.search(r'\s', value)
+
+
+def query_tokens(query: str) -> List[str]:
+    """Tokens en claro con los que se busca una consulta en el índice ciego.
+
+    Solo se busca por host cuando la consulta parece un sitio web: el host
+    de bob@x.com sería x.com y devolvería todas las credenciales de x.com.
+    """
+    value = query.strip().lower()
+    tokens = {f"user:{value}", f"word:{value}"}
+    if _looks_like_host(value) and normalize_host(value):
+        tokens.add(f"host:{normalize_host(value)}")
+    if len(value) >= 3 and re.fullmatch(r'[0-9a-z]+', value):
+        tokens.add(f"prefix:{value}")
+    return sorted(tokens)
+
+
+def matches_query(query: str, website: str, username: str) -> bool:
+    """Comprueba en claro si una credencial candidata del índice ciego coincide con la consulta."""
+    value = query.strip().lower()
+    if value in website.lower() or value in username.lower():
+        return True
+    if not _looks_like_host(value):
+        return False
+    host, candidate = normalize_host(value), normalize_host(website)
+    return bool(host) and (candidate == host or candidate.endswith("." + host))
+
 
 class DatabaseManager:
-    def __init__(self, crypto_manager: CryptoManager):
+    # Migraciones del esquema en orden; la posición (desde 1) es su user_version
+    MIGRATIONS = [
+        '_migration_create_credentials',
+        '_migration_add_indexes',
+        '_migration_search_index',
+        '_migration_change_feed',
+        '_migration_incremental_vacuum',
+        '_migration_blind_index'
+    ]
+
+    # Órdenes admitidos por get_credentials_page, desempatados por id
+    PAGE_ORDERS = {
+        'id': 'id',
+        'website': 'website, id',
+        'updated_at': 'updated_at, id'
+    }
+
+    # Prefijo de los archivos creados por rotate_backups
+    BACKUP_PREFIX = "vault-backup-"
+
+    def __init__(
+        self,
+        crypto_manager: CryptoManager,
+        db_path: Optional[str] = None,
+        synchronous: str = "NORMAL",
+        cache_size: int = -16000,
+        mmap_size: int = 64 * 1024 * 1024,
+        secure_delete: str = "FAST",
+        cache_entries: int = 256,
+        cache_ttl: float = 300
+    ):
         self.crypto_manager = crypto_manager
-        self.db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "vault.db")
-        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.db_path = db_path or os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "vault.db")
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # Pragmas aplicados a cada conexión abierta por el administrador
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        # ON sobrescribe siempre el contenido eliminado; FAST solo cuando no añade E/S
+        self.secure_delete = secure_delete
+        # Una conexión persistente por hilo, reutilizada entre operaciones
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._closed = False
+        self.fts_enabled = False
+        # Caché de contraseñas desencriptadas, indexada por (id, change_seq)
+        self.secret_cache = SecretCache(cache_entries, cache_ttl)
+        # Metadatos (website/username) guardados como texto cifrado con índices ciegos
+        self.metadata_encrypted = False
+        # Rotación periódica de copias de seguridad
+        self._backup_stop: Optional[threading.Event] = None
+        self._backup_thread: Optional[threading.Thread] = None
+        # Mantenimiento en segundo plano (incremental_vacuum en reposo)
+        self._last_activity = time.monotonic()
+        self._maintenance_stop: Optional[threading.Event] = None
+        self._maintenance_thread: Optional[threading.Thread] = None
+        self._maintenance_lock = threading.Lock()
+        self.maintenance_stats = {
+            'runs': 0,
+            'vacuum_steps': 0,
+            'pages_reclaimed': 0,
+            'bytes_reclaimed': 0
+        }
         self.init_database()
 
+    def _connect(self) -> sqlite3.Connection:
+        """Abre una nueva conexión configurada en modo WAL."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA secure_delete={self.secure_delete}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.create_function("vault_blind_tokens", 2, self._blind_tokens_json, deterministic=True)
+        return conn
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Devuelve la conexión persistente del hilo actual, creándola si no existe."""
+        if self._closed:
+            raise ValueError("La base de datos está cerrada")
+        self._last_activity = time.monotonic()
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Cierra todas las conexiones abiertas por el administrador."""
+        self.stop_backup_schedule()
+        self.stop_maintenance()
+        self.secret_cache.clear()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+            self._closed = True
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception as e:
+                print(f"Error al cerrar la conexión: {e}")
+        self._local = threading.local()
+
+    def _ensure_encryption(self) -> None:
+        """Verifica que la encriptación está inicializada."""
+        if not self.crypto_manager or not self.crypto_manager.fernet:
+            print("Error: La encriptación no está inicializada")
+            raise ValueError("La encriptación no está inicializada correctamente")
+
+    def _existing_ids(self, conn: sqlite3.Connection, ids: List[int]) -> set:
+        """Devuelve el subconjunto de ids que existen en la tabla de credenciales."""
+        existing = set()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(f"SELECT id FROM credentials WHERE id IN ({placeholders})", chunk)
+            existing.update(row[0] for row in cursor)
+        return existing
+
+    def _execute_bulk(self, sql: str, rows: List[Tuple], indices: List[int], failed: List[Dict]) -> int:
+        """Ejecuta un lote con executemany en una sola transacción.
+
+        Si el lote completo falla, se reintenta fila a fila dentro de la
+        misma transacción usando savepoints, de modo que solo las filas
+        problemáticas se reportan como fallidas.
+        """
+        if not rows:
+            return 0
+        conn = self.get_connection()
+        with conn:
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            try:
+                conn.execute("SAVEPOINT bulk")
+                conn.executemany(sql, rows)
+                conn.execute("RELEASE bulk")
+                return len(rows)
+            except sqlite3.DatabaseError:
+                conn.execute("ROLLBACK TO bulk")
+                conn.execute("RELEASE bulk")
+
+            written = 0
+            for index, row in zip(indices, rows):
+                try:
+                    conn.execute("SAVEPOINT bulk_row")
+                    conn.execute(sql, row)
+                    conn.execute("RELEASE bulk_row")
+                    written += 1
+                except sqlite3.DatabaseError as e:
+                    conn.execute("ROLLBACK TO bulk_row")
+                    conn.execute("RELEASE bulk_row")
+                    failed.append({'index': index, 'error': str(e)})
+            return written
+
+    def __enter__(self) -> "DatabaseManager":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
     def init_database(self):
-        """Inicializa la base de datos y crea las tablas necesarias."""
+        """Inicializa la base de datos aplicando las migraciones pendientes.
+
+        La versión del esquema se guarda en PRAGMA user_version; si ya está
+        al día no se ejecuta ninguna sentencia DDL.
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS credentials (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        website TEXT NOT NULL,
-                        username TEXT NOT NULL,
-                        encrypted_password BLOB NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                conn.commit()
+            conn = self.get_connection()
+            current_version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for version, migration in enumerate(self.MIGRATIONS, start=1):
+                if version <= current_version:
+                    continue
+                with conn:
+                    conn.execute("BEGIN")
+                    getattr(self, migration)(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+            self._ensure_incremental_vacuum(conn)
+            self.metadata_encrypted = self._get_setting(conn, 'metadata_encrypted') == '1'
+            self.fts_enabled = not self.metadata_encrypted and self._detect_search_index(conn)
+            if self.metadata_encrypted and self._get_setting(conn, 'blind_index_version') != BLIND_INDEX_VERSION:
+                self._rebuild_blind_index(conn)
         except Exception as e:
             print(f"Error al inicializar la base de datos: {e}")
             raise
 
+    @property
+    def schema_version(self) -> int:
+        """Versión actual del esquema de la base de datos."""
+        return self.get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+    def _migration_create_credentials(self, conn: sqlite3.Connection) -> None:
+        """Migración 1: tabla de credenciales."""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS credentials (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                website TEXT NOT NULL,
+                username TEXT NOT NULL,
+                encrypted_password BLOB NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+    def _migration_add_indexes(self, conn: sqlite3.Connection) -> None:
+        """Migración 2: índices secundarios para búsquedas y órdenes de paginación."""
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_credentials_website ON credentials (website)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_credentials_username ON credentials (username)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_credentials_updated_at ON credentials (updated_at)')
+
+    def _migration_search_index(self, conn: sqlite3.Connection) -> None:
+        """Migración 3: índice FTS5 (trigramas) sobre website y username.
+
+        El índice se mantiene sincronizado mediante triggers. Si la versión
+        de SQLite no incluye FTS5, la migración no crea nada y la búsqueda
+        usa LIKE como respaldo.
+        """
+        conn.execute("SAVEPOINT search_index")
+        try:
+            conn.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS credentials_fts USING fts5(
+                    website, username,
+                    content='credentials', content_rowid='id',
+                    tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 no disponible, se usará búsqueda LIKE: {e}")
+            conn.execute("ROLLBACK TO search_index")
+            conn.execute("RELEASE search_index")
+            return
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS credentials_fts_ai AFTER INSERT ON credentials BEGIN
+                INSERT INTO credentials_fts(rowid, website, username)
+                VALUES (new.id, new.website, new.username);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS credentials_fts_ad AFTER DELETE ON credentials BEGIN
+                INSERT INTO credentials_fts(credentials_fts, rowid, website, username)
+                VALUES ('delete', old.id, old.website, old.username);
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS credentials_fts_au AFTER UPDATE OF website, username ON credentials BEGIN
+                INSERT INTO credentials_fts(credentials_fts, rowid, website, username)
+                VALUES ('delete', old.id, old.website, old.username);
+                INSERT INTO credentials_fts(rowid, website, username)
+                VALUES (new.id, new.website, new.username);
+            END
+        ''')
+        conn.execute("INSERT INTO credentials_fts(credentials_fts) VALUES ('rebuild')")
+        conn.execute("RELEASE search_index")
+
+    def _migration_change_feed(self, conn: sqlite3.Connection) -> None:
+        """Migración 4: secuencia de cambios y registro de eliminaciones.
+
+        Cada inserción, actualización o eliminación incrementa un contador
+        global; las filas guardan el valor en change_seq y las eliminaciones
+        dejan una marca (tombstone) en credential_deletions.
+        """
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS change_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                seq INTEGER NOT NULL,
+                pruned_seq INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS credential_deletions (
+                credential_id INTEGER PRIMARY KEY,
+                change_seq INTEGER NOT NULL,
+                deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.execute('ALTER TABLE credentials ADD COLUMN change_seq INTEGER NOT NULL DEFAULT 0')
+        # Las filas existentes reciben una secuencia inicial igual a su id
+        conn.execute('UPDATE credentials SET change_seq = id')
+        conn.execute('INSERT INTO change_state (id, seq) SELECT 1, COALESCE(MAX(id), 0) FROM credentials')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_credentials_change_seq ON credentials (change_seq)')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_credential_deletions_seq ON credential_deletions (change_seq)'
+        )
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS credentials_changes_ai AFTER INSERT ON credentials BEGIN
+                UPDATE change_state SET seq = seq + 1 WHERE id = 1;
+                UPDATE credentials SET change_seq = (SELECT seq FROM change_state WHERE id = 1)
+                WHERE id = new.id;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS credentials_changes_au
+            AFTER UPDATE OF website, username, encrypted_password, updated_at ON credentials BEGIN
+                UPDATE change_state SET seq = seq + 1 WHERE id = 1;
+                UPDATE credentials SET change_seq = (SELECT seq FROM change_state WHERE id = 1)
+                WHERE id = new.id;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS credentials_changes_ad AFTER DELETE ON credentials BEGIN
+                UPDATE change_state SET seq = seq + 1 WHERE id = 1;
+                INSERT OR REPLACE INTO credential_deletions (credential_id, change_seq)
+                VALUES (old.id, (SELECT seq FROM change_state WHERE id = 1));
+            END
+        ''')
+
+    def _migration_incremental_vacuum(self, conn: sqlite3.Connection) -> None:
+        """Migración 5: activa auto_vacuum=INCREMENTAL.
+
+        El modo solo se aplica tras un VACUUM, que no puede ejecutarse dentro
+        de una transacción; lo completa _ensure_incremental_vacuum.
+        """
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+    def _ensure_incremental_vacuum(self, conn: sqlite3.Connection) -> None:
+        """Reconstruye la base de datos con VACUUM si aún no usa auto_vacuum incremental."""
+        if self.schema_version < self.MIGRATIONS.index('_migration_incremental_vacuum') + 1:
+            return
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            return
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+    def _migration_blind_index(self, conn: sqlite3.Connection) -> None:
+        """Migración 6: ajustes del vault e índice ciego de metadatos."""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS vault_settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS credential_tokens (
+                token TEXT NOT NULL,
+                credential_id INTEGER NOT NULL,
+                PRIMARY KEY (token, credential_id)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_credential_tokens_credential ON credential_tokens (credential_id)'
+        )
+
+    def _get_setting(self, conn: sqlite3.Connection, key: str) -> Optional[str]:
+        """Lee un ajuste persistente del vault."""
+        row = conn.execute('SELECT value FROM vault_settings WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_setting(self, key: str) -> Optional[str]:
+        """Lee un ajuste persistente del vault."""
+        return self._get_setting(self.get_connection(), key)
+
+    def set_setting(self, key: str, value: Optional[str]) -> None:
+        """Guarda un ajuste persistente del vault; None lo elimina."""
+        with self.get_connection() as conn:
+            if value is None:
+                conn.execute('DELETE FROM vault_settings WHERE key = ?', (key,))
+            else:
+                conn.execute('INSERT OR REPLACE INTO vault_settings (key, value) VALUES (?, ?)', (key, value))
+
+    def _rebuild_blind_index(self, conn: sqlite3.Connection) -> None:
+        """Regenera credential_tokens cuando cambian los tokens que se indexan."""
+        self._ensure_encryption()
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute("DELETE FROM credential_tokens")
+            conn.execute('''
+                INSERT OR IGNORE INTO credential_tokens (token, credential_id)
+                SELECT t.value, c.id FROM credentials c, json_each(vault_blind_tokens(c.website, c.username)) t
+            ''')
+            conn.execute(
+                "INSERT OR REPLACE INTO vault_settings (key, value) VALUES ('blind_index_version', ?)",
+                (BLIND_INDEX_VERSION,)
+            )
+
+    def _blind_tokens_json(self, encrypted_website: str, encrypted_username: str) -> str:
+        """Función SQL: índices ciegos (JSON) de una credencial con metadatos encriptados."""
+        website = self.crypto_manager.decrypt_data(encrypted_website.encode())
+        username = self.crypto_manager.decrypt_data(encrypted_username.encode())
+        return json.dumps([
+            self.crypto_manager.blind_index(token) for token in metadata_tokens(website, username)
+        ])
+
+    def _decode_metadata(self, value: str) -> str:
+        """Desencripta un campo de metadatos si el vault los guarda encriptados."""
+        if not self.metadata_encrypted:
+            return value
+        return self.crypto_manager.decrypt_data(value.encode())
+
+    def _encode_metadata(self, website: str, username: str) -> Tuple[str, str]:
+        """Encripta website y username si el vault guarda los metadatos encriptados."""
+        if not self.metadata_encrypted:
+            return website, username
+        return (
+            self.crypto_manager.encrypt_data(website).decode(),
+            self.crypto_manager.encrypt_data(username).decode()
+        )
+
+    def enable_encrypted_metadata(self) -> None:
+        """Activa el modo de metadatos encriptados y convierte las credenciales existentes.
+
+        website y username pasan a guardarse como texto cifrado y las
+        búsquedas usan la tabla credential_tokens, que guarda índices ciegos
+        HMAC del host exacto, sus dominios padre, el usuario normalizado,
+        sus palabras y los prefijos de las palabras. Los triggers la
+        mantienen sincronizada. El índice FTS5 se elimina, porque solo
+        contendría texto cifrado.
+        """
+        if self.metadata_encrypted:
+            return
+        self._ensure_encryption()
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                for trigger in ("credentials_fts_ai", "credentials_fts_ad", "credentials_fts_au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+                conn.execute("DROP TABLE IF EXISTS credentials_fts")
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS credential_tokens_ai AFTER INSERT ON credentials BEGIN
+                        INSERT OR IGNORE INTO credential_tokens (token, credential_id)
+                        SELECT value, new.id FROM json_each(vault_blind_tokens(new.website, new.username));
+                    END
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS credential_tokens_au
+                    AFTER UPDATE OF website, username ON credentials BEGIN
+                        DELETE FROM credential_tokens WHERE credential_id = old.id;
+                        INSERT OR IGNORE INTO credential_tokens (token, credential_id)
+                        SELECT value, new.id FROM json_each(vault_blind_tokens(new.website, new.username));
+                    END
+                ''')
+                conn.execute('''
+                    CREATE TRIGGER IF NOT EXISTS credential_tokens_ad AFTER DELETE ON credentials BEGIN
+                        DELETE FROM credential_tokens WHERE credential_id = old.id;
+                    END
+                ''')
+                rows = conn.execute('SELECT id, website, username FROM credentials').fetchall()
+                encrypted_websites = self.crypto_manager.encrypt_many(row[1] for row in rows)
+                encrypted_usernames = self.crypto_manager.encrypt_many(row[2] for row in rows)
+                conn.executemany(
+                    'UPDATE credentials SET website = ?, username = ? WHERE id = ?',
+                    [
+                        (website.decode(), username.decode(), row[0])
+                        for row, website, username in zip(rows, encrypted_websites, encrypted_usernames)
+                    ]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO vault_settings (key, value) VALUES ('metadata_encrypted', '1')"
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO vault_settings (key, value) VALUES ('blind_index_version', ?)",
+                    (BLIND_INDEX_VERSION,)
+                )
+            self.metadata_encrypted = True
+            self.fts_enabled = False
+        except Exception as e:
+            print(f"Error al encriptar los metadatos: {e}")
+            raise ValueError(f"Error al encriptar los metadatos: {str(e)}")
+
+    def reencrypt(self, new_crypto_manager: CryptoManager, batch_size: int = 500) -> int:
+        """Vuelve a encriptar todas las credenciales con otra clave, en una sola transacción.
+
+        Las filas que ya se desencriptan con la clave nueva no se tocan, así
+        que una re-encriptación interrumpida puede repetirse. Los índices
+        ciegos se recalculan con la clave nueva a través de los triggers.
+        Al terminar, el administrador usa new_crypto_manager. Devuelve el
+        número de filas re-encriptadas.
+        """
+        old_crypto_manager = self.crypto_manager
+        conn = self.get_connection()
+        try:
+            with conn:
+                conn.execute("BEGIN")
+                # Los triggers del índice ciego ya desencriptan con la clave nueva
+                self.crypto_manager = new_crypto_manager
+                rows = conn.execute(
+                    'SELECT id, website, username, encrypted_password FROM credentials ORDER BY id'
+                ).fetchall()
+                updated = 0
+                for start in range(0, len(rows), batch_size):
+                    batch = rows[start:start + batch_size]
+                    current = new_crypto_manager.decrypt_many(row[3] for row in batch)
+                    pending = [row for row, password in zip(batch, current) if password is None]
+                    passwords = old_crypto_manager.decrypt_many(row[3] for row in pending)
+                    values = []
+                    for row, password in zip(pending, passwords):
+                        if password is None:
+                            print(f"Error al desencriptar contraseña de la credencial {row[0]}")
+                            continue
+                        website, username = row[1], row[2]
+                        if self.metadata_encrypted:
+                            website = old_crypto_manager.decrypt_data(website.encode())
+                            username = old_crypto_manager.decrypt_data(username.encode())
+                            website, username = (
+                                new_crypto_manager.encrypt_data(website).decode(),
+                                new_crypto_manager.encrypt_data(username).decode()
+                            )
+                        values.append((website, username, new_crypto_manager.encrypt_data(password), row[0]))
+                    conn.executemany(
+                        'UPDATE credentials SET website = ?, username = ?, encrypted_password = ? WHERE id = ?',
+                        values
+                    )
+                    updated += len(values)
+            self.secret_cache.clear()
+            return updated
+        except Exception as e:
+            self.crypto_manager = old_crypto_manager
+            print(f"Error al re-encriptar la base de datos: {e}")
+            raise ValueError(f"Error al re-encriptar la base de datos: {str(e)}")
+
+    def _detect_search_index(self, conn: sqlite3.Connection) -> bool:
+        """Indica si el índice FTS5 existe y puede usarse con esta versión de SQLite.
+
+        Si la base de datos se creó con FTS5 pero el SQLite actual no lo
+        incluye, se eliminan los triggers para que las escrituras sigan
+        funcionando.
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'credentials_fts'"
+        ).fetchone()
+        if not exists:
+            return False
+        try:
+            conn.execute("SELECT rowid FROM credentials_fts LIMIT 0")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 no disponible, se usará búsqueda LIKE: {e}")
+            with conn:
+                for trigger in ("credentials_fts_ai", "credentials_fts_ad", "credentials_fts_au"):
+                    conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            return False
+
+    def _decrypt_rows(self, rows: List[Tuple], password_index: int) -> List[Tuple[Tuple, str]]:
+        """Desencripta en lote la columna de contraseña y descarta las filas inválidas."""
+        passwords = self.crypto_manager.decrypt_many(row[password_index] for row in rows)
+        decrypted = []
+        for row, password in zip(rows, passwords):
+            if password is None:
+                print(f"Error al desencriptar contraseña de la credencial {row[0]}")
+                continue
+            decrypted.append((row, password))
+        return decrypted
+
+    def _row_to_metadata(self, row: Tuple) -> Credential:
+        """Convierte una fila (id, website, username, created_at, updated_at) en una credencial sin contraseña."""
+        return Credential(
+            row[0],
+            self._decode_metadata(row[1]),
+            self._decode_metadata(row[2]),
+            created_at=row[3],
+            updated_at=row[4]
+        )
+
+    def _select_matching(
+        self,
+        conn: sqlite3.Connection,
+        columns: List[str],
+        query: str,
+        limit: Optional[int] = None
+    ) -> List[Tuple]:
+        """Selecciona las credenciales cuyo website o username contienen la consulta.
+
+        Usa el índice FTS5 ordenado por relevancia cuando está disponible y la
+        consulta tiene al menos tres caracteres; en otro caso recurre a LIKE.
+        Con metadatos encriptados, busca por igualdad en el índice ciego
+        (host, dominio padre, usuario, palabra o prefijo de palabra) y
+        desencripta los candidatos para descartar los que no coinciden con
+        la consulta; columns debe incluir website y username.
+        """
+        selected = ", ".join(f"c.{column}" for column in columns)
+        if self.metadata_encrypted:
+            tokens = [self.crypto_manager.blind_index(token) for token in query_tokens(query)]
+            rows = conn.execute(f'''
+                SELECT {selected}
+                FROM credentials c
+                WHERE c.id IN (
+                    SELECT credential_id FROM credential_tokens WHERE token IN ({", ".join("?" * len(tokens))})
+                )
+            ''', tokens).fetchall()
+            website_at, username_at = columns.index('website'), columns.index('username')
+            rows = [
+                row for row in rows
+                if matches_query(
+                    query, self._decode_metadata(row[website_at]), self._decode_metadata(row[username_at])
+                )
+            ]
+            return rows if limit is None else rows[:int(limit)]
+        if self.fts_enabled and len(query) >= 3:
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = f'''
+                SELECT {selected}
+                FROM credentials_fts f JOIN credentials c ON c.id = f.rowid
+                WHERE credentials_fts MATCH ?
+                ORDER BY f.rank
+            '''
+            params = (phrase,)
+        else:
+            search_query = f"%{query}%"
+            sql = f'''
+                SELECT {selected}
+                FROM credentials c
+                WHERE c.website LIKE ? OR c.username LIKE ?
+            '''
+            params = (search_query, search_query)
+        if limit is not None:
+            sql += " LIMIT ?"
+            params += (int(limit),)
+        return conn.execute(sql, params).fetchall()
+
     def add_credential(self, website: str, username: str, password: str) -> bool:
         """Agrega una nueva credencial a la base de datos."""
         try:
@@ -46,40 +713,35 @@ class DatabaseManager:
                 raise ValueError(f"Error al encriptar la contraseña: {str(e)}")
 
             # Intentar guardar en la base de datos
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT INTO credentials (website, username, encrypted_password)
                     VALUES (?, ?, ?)
-                ''', (website, username, encrypted_password))
+                ''', (*self._encode_metadata(website, username), encrypted_password))
                 conn.commit()
             return True
         except Exception as e:
             print(f"Error al agregar credencial: {e}")
             raise ValueError(f"Error al guardar la credencial: {str(e)}")
 
-    def get_credentials(self) -> List[Dict]:
+    def get_credentials(self) -> List[Credential]:
         """Obtiene todas las credenciales almacenadas."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('SELECT id, website, username, encrypted_password FROM credentials')
                 rows = cursor.fetchall()
-                
-                credentials = []
-                for row in rows:
-                    try:
-                        decrypted_password = self.crypto_manager.decrypt_data(row[3])
-                        credentials.append({
-                            'id': row[0],
-                            'website': row[1],
-                            'username': row[2],
-                            'password': decrypted_password
-                        })
-                    except Exception as e:
-                        print(f"Error al desencriptar contraseña: {e}")
-                        continue
-                return credentials
+
+            return [
+                Credential(
+                    row[0],
+                    self._decode_metadata(row[1]),
+                    self._decode_metadata(row[2]),
+                    decrypted_password
+                )
+                for row, decrypted_password in self._decrypt_rows(rows, 3)
+            ]
         except Exception as e:
             print(f"Error al obtener credenciales: {e}")
             return []
@@ -100,14 +762,15 @@ class DatabaseManager:
                 raise ValueError(f"Error al encriptar la contraseña: {str(e)}")
 
             # Intentar actualizar en la base de datos
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     UPDATE credentials 
                     SET website = ?, username = ?, encrypted_password = ?, updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
-                ''', (website, username, encrypted_password, credential_id))
+                ''', (*self._encode_metadata(website, username), encrypted_password, credential_id))
                 conn.commit()
+            self.secret_cache.invalidate(credential_id)
             return True
         except Exception as e:
             print(f"Error al actualizar credencial: {e}")
@@ -116,42 +779,527 @@ class DatabaseManager:
     def delete_credential(self, credential_id: int) -> bool:
         """Elimina una credencial de la base de datos."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
                 cursor.execute('DELETE FROM credentials WHERE id = ?', (credential_id,))
                 conn.commit()
+            self.secret_cache.invalidate(credential_id)
             return True
         except Exception as e:
             print(f"Error al eliminar credencial: {e}")
             return False
 
-    def search_credentials(self, query: str) -> List[Dict]:
-        """Busca credenciales que coincidan con la consulta."""
+    def search_credentials(self, query: str, limit: Optional[int] = None) -> List[Credential]:
+        """Busca credenciales que coincidan con la consulta, ordenadas por relevancia."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self.get_connection() as conn:
+                rows = self._select_matching(
+                    conn, ['id', 'website', 'username', 'encrypted_password'], query, limit
+                )
+
+            return [
+                Credential(
+                    row[0],
+                    self._decode_metadata(row[1]),
+                    self._decode_metadata(row[2]),
+                    decrypted_password
+                )
+                for row, decrypted_password in self._decrypt_rows(rows, 3)
+            ]
+        except Exception as e:
+            print(f"Error al buscar credenciales: {e}")
+            return []
+
+    def list_credentials(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Credential]:
+        """Obtiene los metadatos de las credenciales sin desencriptar contraseñas."""
+        try:
+            with self.get_connection() as conn:
+                if query:
+                    rows = self._select_matching(
+                        conn, ['id', 'website', 'username', 'created_at', 'updated_at'], query, limit
+                    )
+                else:
+                    sql = 'SELECT id, website, username, created_at, updated_at FROM credentials'
+                    if limit is not None:
+                        sql += f' LIMIT {int(limit)}'
+                    rows = conn.execute(sql).fetchall()
+                return [self._row_to_metadata(row) for row in rows]
+        except Exception as e:
+            print(f"Error al listar credenciales: {e}")
+            return []
+
+    def iter_credentials(self, batch_size: int = 500, with_passwords: bool = False) -> Iterator[Credential]:
+        """Recorre todas las credenciales en lotes con fetchmany.
+
+        Solo mantiene un lote en memoria a la vez. Por defecto entrega los
+        metadatos; con with_passwords=True desencripta cada fila del lote.
+        """
+        cursor = self.get_connection().cursor()
+        try:
+            cursor.execute(
+                'SELECT id, website, username, created_at, updated_at, encrypted_password '
+                'FROM credentials ORDER BY id'
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if with_passwords:
+                    for row, decrypted_password in self._decrypt_rows(rows, 5):
+                        credential = self._row_to_metadata(row)
+                        credential.password = decrypted_password
+                        yield credential
+                else:
+                    for row in rows:
+                        yield self._row_to_metadata(row)
+        finally:
+            cursor.close()
+
+    def get_credentials_page(
+        self,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        order_by: str = 'id'
+    ) -> List[Credential]:
+        """Obtiene una página de metadatos usando paginación por clave (keyset).
+
+        order_by puede ser 'id', 'website' o 'updated_at'. after_id es el id
+        de la última credencial de la página anterior; la posición se
+        resuelve con el valor de orden de esa fila, desempatando por id, de
+        modo que cada página cuesta O(log n + limit) gracias a los índices.
+        """
+        if order_by not in self.PAGE_ORDERS:
+            raise ValueError(f"Orden no soportado: {order_by}")
+        if order_by == 'website' and self.metadata_encrypted:
+            raise ValueError("No se puede ordenar por sitio web con metadatos encriptados")
+        columns = 'id, website, username, created_at, updated_at'
+        try:
+            with self.get_connection() as conn:
+                if after_id is None:
+                    rows = conn.execute(
+                        f'SELECT {columns} FROM credentials ORDER BY {self.PAGE_ORDERS[order_by]} LIMIT ?',
+                        (limit,)
+                    ).fetchall()
+                elif order_by == 'id':
+                    rows = conn.execute(
+                        f'SELECT {columns} FROM credentials WHERE id > ? ORDER BY id LIMIT ?',
+                        (after_id, limit)
+                    ).fetchall()
+                else:
+                    anchor = conn.execute(
+                        f'SELECT {order_by} FROM credentials WHERE id = ?', (after_id,)
+                    ).fetchone()
+                    if anchor is None:
+                        raise ValueError(f"No existe la credencial {after_id}")
+                    rows = conn.execute(
+                        f'SELECT {columns} FROM credentials '
+                        f'WHERE ({order_by}, id) > (?, ?) '
+                        f'ORDER BY {self.PAGE_ORDERS[order_by]} LIMIT ?',
+                        (anchor[0], after_id, limit)
+                    ).fetchall()
+                return [self._row_to_metadata(row) for row in rows]
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Error al obtener página de credenciales: {e}")
+            return []
+
+    def get_changes_since(self, watermark: int = 0) -> Dict:
+        """Obtiene los cambios posteriores a una marca de agua.
+
+        Devuelve {'changed': [...], 'deleted': [ids], 'watermark': n,
+        'full_resync': bool}. 'changed' contiene los metadatos de las filas
+        insertadas o actualizadas y 'deleted' los ids eliminados desde
+        watermark; el coste es proporcional al número de cambios gracias a
+        los índices sobre change_seq. Si las marcas de eliminación anteriores
+        a watermark ya se purgaron, 'full_resync' indica que el llamador debe
+        recargar todo.
+        """
+        conn = self.get_connection()
+        try:
+            with conn:
+                # Una sola transacción de lectura para obtener una vista consistente
+                conn.execute("BEGIN")
+                seq, pruned_seq = conn.execute(
+                    'SELECT seq, pruned_seq FROM change_state WHERE id = 1'
+                ).fetchone()
+                rows = conn.execute('''
+                    SELECT id, website, username, created_at, updated_at, change_seq
+                    FROM credentials
+                    WHERE change_seq > ?
+                    ORDER BY change_seq
+                ''', (watermark,)).fetchall()
+                deleted = [
+                    row[0] for row in conn.execute('''
+                        SELECT credential_id FROM credential_deletions
+                        WHERE change_seq > ?
+                        ORDER BY change_seq
+                    ''', (watermark,))
+                ]
+            changed = []
+            for row in rows:
+                credential = self._row_to_metadata(row)
+                credential.change_seq = row[5]
+                changed.append(credential)
+            return {
+                'changed': changed,
+                'deleted': deleted,
+                'watermark': seq,
+                'full_resync': watermark < pruned_seq
+            }
+        except Exception as e:
+            print(f"Error al obtener cambios: {e}")
+            raise ValueError(f"Error al obtener los cambios: {str(e)}")
+
+    def prune_deletions(self, watermark: int) -> int:
+        """Purga las marcas de eliminación hasta watermark (incluido)."""
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.execute(
+                    'DELETE FROM credential_deletions WHERE change_seq <= ?', (watermark,)
+                )
+                conn.execute(
+                    'UPDATE change_state SET pruned_seq = MAX(pruned_seq, ?) WHERE id = 1', (watermark,)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            print(f"Error al purgar eliminaciones: {e}")
+            return 0
+
+    def reveal_password(self, credential_id: int) -> Optional[str]:
+        """Desencripta bajo demanda la contraseña de una sola credencial."""
+        try:
+            with self.get_connection() as conn:
                 cursor = conn.cursor()
-                search_query = f"%{query}%"
-                cursor.execute('''
-                    SELECT id, website, username, encrypted_password 
-                    FROM credentials 
-                    WHERE website LIKE ? OR username LIKE ?
-                ''', (search_query, search_query))
-                rows = cursor.fetchall()
-                
-                credentials = []
-                for row in rows:
+                cursor.execute(
+                    'SELECT encrypted_password, change_seq FROM credentials WHERE id = ?', (credential_id,)
+                )
+                row = cursor.fetchone()
+            if row is None:
+                self.secret_cache.invalidate(credential_id)
+                return None
+            password = self.secret_cache.get(credential_id, row[1])
+            if password is None:
+                password = self.crypto_manager.decrypt_data(row[0])
+                self.secret_cache.put(credential_id, row[1], password)
+            return password
+        except Exception as e:
+            print(f"Error al desencriptar contraseña: {e}")
+            return None
+
+    def _encode_bulk_row(self, cred: Dict) -> Tuple[str, str]:
+        """Valida una fila de un lote y devuelve sus metadatos codificados."""
+        if not isinstance(cred, (Mapping, Credential)):
+            raise ValueError("Cada fila debe ser un diccionario de credencial")
+        if not cred['website'] or not cred['username'] or not cred['password']:
+            raise ValueError("Todos los campos son obligatorios")
+        for field in ('website', 'username', 'password'):
+            if not isinstance(cred[field], str):
+                raise ValueError(f"El campo {field} debe ser texto")
+        return self._encode_metadata(cred['website'], cred['username'])
+
+    def add_credentials_bulk(self, credentials: Iterable[Dict]) -> Dict:
+        """Agrega muchas credenciales en una sola transacción.
+
+        Cada elemento debe tener las claves 'website', 'username' y 'password'.
+        Devuelve {'written': n, 'failed': [{'index', 'error'}, ...]} sin
+        abortar el lote completo cuando alguna fila falla.
+        """
+        self._ensure_encryption()
+        valid, metadata, indices, failed = [], [], [], []
+        for index, cred in enumerate(credentials):
+            try:
+                metadata.append(self._encode_bulk_row(cred))
+                valid.append(cred)
+                indices.append(index)
+            except Exception as e:
+                failed.append({'index': index, 'error': str(e)})
+
+        try:
+            encrypted_passwords = self.crypto_manager.encrypt_many(cred['password'] for cred in valid)
+            rows = [
+                (*encoded, encrypted_password)
+                for encoded, encrypted_password in zip(metadata, encrypted_passwords)
+            ]
+            written = self._execute_bulk('''
+                INSERT INTO credentials (website, username, encrypted_password)
+                VALUES (?, ?, ?)
+            ''', rows, indices, failed)
+        except Exception as e:
+            print(f"Error al agregar credenciales en lote: {e}")
+            raise ValueError(f"Error al guardar las credenciales: {str(e)}")
+        failed.sort(key=lambda f: f['index'])
+        return {'written': written, 'failed': failed}
+
+    def update_credentials_bulk(self, credentials: Iterable[Dict]) -> Dict:
+        """Actualiza muchas credenciales en una sola transacción.
+
+        Cada elemento debe tener las claves 'id', 'website', 'username' y
+        'password'. Los ids inexistentes se reportan como fallos.
+        """
+        self._ensure_encryption()
+        credentials = list(credentials)
+        candidates, failed = [], []
+        for index, cred in enumerate(credentials):
+            try:
+                encoded = self._encode_bulk_row(cred)
+                if not isinstance(cred.get('id'), int) or isinstance(cred.get('id'), bool):
+                    raise ValueError("Falta el id entero de la credencial")
+                candidates.append((index, cred, encoded))
+            except Exception as e:
+                failed.append({'index': index, 'error': str(e)})
+
+        try:
+            existing = self._existing_ids(self.get_connection(), [cred['id'] for _, cred, _ in candidates])
+            valid, metadata, indices = [], [], []
+            for index, cred, encoded in candidates:
+                if cred['id'] in existing:
+                    valid.append(cred)
+                    metadata.append(encoded)
+                    indices.append(index)
+                else:
+                    failed.append({'index': index, 'error': f"No existe la credencial {cred['id']}"})
+
+            encrypted_passwords = self.crypto_manager.encrypt_many(cred['password'] for cred in valid)
+            rows = [
+                (*encoded, encrypted_password, cred['id'])
+                for cred, encoded, encrypted_password in zip(valid, metadata, encrypted_passwords)
+            ]
+
+            written = self._execute_bulk('''
+                UPDATE credentials
+                SET website = ?, username = ?, encrypted_password = ?, updated_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', rows, indices, failed)
+            for cred in valid:
+                self.secret_cache.invalidate(cred['id'])
+        except Exception as e:
+            print(f"Error al actualizar credenciales en lote: {e}")
+            raise ValueError(f"Error al actualizar las credenciales: {str(e)}")
+        failed.sort(key=lambda f: f['index'])
+        return {'written': written, 'failed': failed}
+
+    def delete_credentials_bulk(self, credential_ids: Iterable[int]) -> Dict:
+        """Elimina muchas credenciales en una sola transacción.
+
+        Los ids inexistentes se reportan como fallos sin abortar el lote.
+        """
+        credential_ids = list(credential_ids)
+        rows, indices, failed = [], [], []
+        try:
+            existing = self._existing_ids(
+                self.get_connection(),
+                [cid for cid in credential_ids if isinstance(cid, int)]
+            )
+            for index, credential_id in enumerate(credential_ids):
+                if credential_id in existing:
+                    rows.append((credential_id,))
+                    indices.append(index)
+                else:
+                    failed.append({'index': index, 'error': f"No existe la credencial {credential_id}"})
+            written = self._execute_bulk('DELETE FROM credentials WHERE id = ?', rows, indices, failed)
+            for (credential_id,) in rows:
+                self.secret_cache.invalidate(credential_id)
+        except Exception as e:
+            print(f"Error al eliminar credenciales en lote: {e}")
+            return {
+                'written': 0,
+                'failed': [{'index': index, 'error': str(e)} for index in range(len(credential_ids))]
+            }
+        failed.sort(key=lambda f: f['index'])
+        return {'written': written, 'failed': failed}
+
+    def backup(
+        self,
+        dest: str,
+        pages_per_step: int = 64,
+        progress: Optional[Callable[[int, int], None]] = None,
+        step_sleep: float = 0.005
+    ) -> bool:
+        """Copia la base de datos en caliente con la API de backup de SQLite.
+
+        La copia avanza de pages_per_step páginas en pages_per_step páginas,
+        durmiendo step_sleep segundos entre pasos para no bloquear a los
+        escritores. progress(copiadas, total) se llama tras cada paso. La
+        copia se escribe en un archivo temporal, se verifica con
+        PRAGMA integrity_check y solo entonces reemplaza a dest.
+        """
+        dest = os.path.abspath(dest)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp_path = dest + ".tmp"
+
+        def on_progress(status: int, remaining: int, total: int) -> None:
+            if progress:
+                progress(total - remaining, total)
+
+        try:
+            # Conexión de origen propia: la copia puede correr en cualquier hilo
+            source = self._connect()
+            target = sqlite3.connect(tmp_path)
+            try:
+                source.backup(
+                    target,
+                    pages=pages_per_step,
+                    progress=on_progress,
+                    sleep=step_sleep
+                )
+                result = target.execute("PRAGMA integrity_check").fetchone()[0]
+            finally:
+                target.close()
+                source.close()
+            if result != "ok":
+                raise ValueError(f"La copia no superó la verificación de integridad: {result}")
+            os.replace(tmp_path, dest)
+            return True
+        except Exception as e:
+            print(f"Error al crear la copia de seguridad: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise ValueError(f"Error al crear la copia de seguridad: {str(e)}")
+
+    def backup_in_background(
+        self,
+        dest: str,
+        pages_per_step: int = 64,
+        progress: Optional[Callable[[int, int], None]] = None,
+        on_done: Optional[Callable[[Optional[Exception]], None]] = None
+    ) -> threading.Thread:
+        """Ejecuta backup() en un hilo de fondo; on_done recibe el error o None."""
+        def run():
+            error = None
+            try:
+                self.backup(dest, pages_per_step=pages_per_step, progress=progress)
+            except Exception as e:
+                error = e
+            if on_done:
+                on_done(error)
+
+        thread = threading.Thread(target=run, name="vault-backup", daemon=True)
+        thread.start()
+        return thread
+
+    def rotate_backups(self, directory: str, keep: int = 7) -> List[str]:
+        """Crea una copia con fecha en directory y elimina las más antiguas.
+
+        Devuelve la lista de copias conservadas, de la más antigua a la más
+        reciente.
+        """
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        self.backup(os.path.join(directory, f"{self.BACKUP_PREFIX}{stamp}.db"))
+        backups = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith(self.BACKUP_PREFIX) and name.endswith(".db")
+        )
+        for name in backups[:-keep] if keep > 0 else []:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError as e:
+                print(f"Error al eliminar copia antigua {name}: {e}")
+        return [os.path.join(directory, name) for name in backups[-keep:]]
+
+    def start_backup_schedule(self, directory: str, interval: float = 3600, keep: int = 7) -> None:
+        """Inicia la rotación periódica de copias en un hilo de fondo."""
+        self.stop_backup_schedule()
+        stop_event = threading.Event()
+
+        def run():
+            while not stop_event.wait(interval):
+                try:
+                    self.rotate_backups(directory, keep)
+                except Exception as e:
+                    print(f"Error en la copia programada: {e}")
+
+        self._backup_stop = stop_event
+        self._backup_thread = threading.Thread(target=run, name="vault-backup-schedule", daemon=True)
+        self._backup_thread.start()
+
+    def stop_backup_schedule(self) -> None:
+        """Detiene la rotación periódica de copias, si está activa."""
+        if self._backup_stop is not None:
+            self._backup_stop.set()
+            if self._backup_thread is not threading.current_thread():
+                self._backup_thread.join()
+            self._backup_stop = None
+            self._backup_thread = None
+
+    def _incremental_vacuum_step(self, conn: sqlite3.Connection, max_pages: int) -> int:
+        """Libera hasta max_pages páginas libres y devuelve los bytes recuperados."""
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if before == 0:
+            return 0
+        # executescript avanza la pragma hasta el final; execute solo da un paso
+        conn.executescript(f"PRAGMA incremental_vacuum({int(max_pages)});")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        reclaimed = (before - after) * page_size
+        with self._maintenance_lock:
+            self.maintenance_stats['vacuum_steps'] += 1
+            self.maintenance_stats['pages_reclaimed'] += before - after
+            self.maintenance_stats['bytes_reclaimed'] += reclaimed
+        return reclaimed
+
+    def free_page_ratio(self) -> float:
+        """Proporción de páginas libres (freelist_count / page_count)."""
+        conn = self.get_connection()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return freelist_count / page_count if page_count else 0.0
+
+    def run_incremental_vacuum(self, max_pages: int = 256) -> int:
+        """Ejecuta un paso acotado de incremental_vacuum y devuelve los bytes recuperados."""
+        try:
+            return self._incremental_vacuum_step(self.get_connection(), max_pages)
+        except Exception as e:
+            print(f"Error en el mantenimiento de la base de datos: {e}")
+            return 0
+
+    def start_maintenance(
+        self,
+        interval: float = 30,
+        idle_seconds: float = 5,
+        free_ratio_threshold: float = 0.1,
+        max_pages_per_step: int = 256
+    ) -> None:
+        """Inicia la tarea de mantenimiento en segundo plano.
+
+        Cada interval segundos, si no ha habido actividad durante
+        idle_seconds y las páginas libres superan free_ratio_threshold del
+        total, ejecuta pasos de incremental_vacuum de max_pages_per_step
+        páginas hasta vaciar la lista libre o hasta que vuelva la actividad.
+        """
+        self.stop_maintenance()
+        stop_event = threading.Event()
+
+        def run():
+            conn = self._connect()
+            try:
+                while not stop_event.wait(interval):
                     try:
-                        decrypted_password = self.crypto_manager.decrypt_data(row[3])
-                        credentials.append({
-                            'id': row[0],
-                            'website': row[1],
-                            'username': row[2],
-                            'password': decrypted_password
-                        })
+                        while not stop_event.is_set():
+                            if time.monotonic() - self._last_activity < idle_seconds:
+                                break
+                            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+                            freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                            if not page_count or freelist_count / page_count < free_ratio_threshold:
+                                break
+                            if not self._incremental_vacuum_step(conn, max_pages_per_step):
+                                break
+                        with self._maintenance_lock:
+                            self.maintenance_stats['runs'] += 1
                     except Exception as e:
-                        print(f"Error al desencriptar contraseña: {e}")
-                        continue
-                return credentials
-        except Exception as e:
-            print(f"Error al buscar credenciales: {e}")
-            return [] 
\ No newline at end of file
+                        print(f"Error en el mantenimiento de la base de datos: {e}")
+            finally:
+                conn.close()
+
+        self._maintenance_stop = stop_event
+        self._maintenance_thread = threading.Thread(target=run, name="vault-maintenance", daemon=True)
+        self._maintenance_thread.start()
+
+    def stop_maintenance(self) -> None:
+        """Detiene la tarea de mantenimiento, si está activa."""
+        if self._maintenance_stop is not None:
+            self._maintenance_stop.set()
+            if self._maintenance_thread is not threading.current_thread():
+                self._maintenance_thread.join()
+            self._maintenance_stop = None
+            self._maintenance_thread = None
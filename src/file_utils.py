@@ -0,0 +1,90 @@
+import os
+import tempfile
+import threading
+from typing import Callable, Iterable, Optional
+
+def _fsync_directory(path: str) -> None:
+    """Sincroniza el directorio para que un rename sobreviva a un corte de energía."""
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path: str, data: bytes) -> None:
+    """Escribe un archivo de forma atómica: temporal + fsync + os.replace.
+
+    Si el proceso se interrumpe, el archivo de destino conserva su
+    contenido anterior completo o el nuevo completo, nunca una mezcla.
+    """
+    atomic_write_stream(path, [data])
+
+def atomic_write_stream(path: str, chunks: Iterable[bytes]) -> None:
+    """Como atomic_write, pero escribe los datos a medida que se generan."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _fsync_directory(path)
+
+def durable_append(path: str, data: bytes) -> None:
+    """Agrega datos al final de un archivo y los sincroniza a disco."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+class WriteBehind:
+    """Agrupa escrituras dentro de una ventana de tiempo.
+
+    schedule() programa una llamada a flush_callback tras window segundos;
+    las llamadas adicionales dentro de la ventana se agrupan en la misma
+    escritura. Con window=0 la escritura es inmediata. flush() fuerza la
+    escritura pendiente (por ejemplo al cerrar sesión o salir).
+    """
+
+    def __init__(self, flush_callback: Callable[[], None], window: float = 0.25):
+        self.flush_callback = flush_callback
+        self.window = window
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def schedule(self) -> None:
+        """Programa la escritura pendiente dentro de la ventana configurada."""
+        if self.window <= 0:
+            self.flush_callback()
+            return
+        with self._lock:
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self._on_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _on_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+        try:
+            self.flush_callback()
+        except Exception as e:
+            print(f"Error en la escritura diferida: {e}")
+
+    def flush(self) -> None:
+        """Cancela el temporizador y escribe de inmediato lo pendiente."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self.flush_callback()
@@ -8,17 +8,20 @@ from typing import Callable, Optional
 from PIL import Image
 import os
 from crypto_utils import CryptoManager
-from vault import PasswordVault
 from auth import AuthManager
-from database import DatabaseManager
+from storage import SQLiteStorage, StorageBackend, create_storage, migrate_vault_to_sqlite
 
 class SecureVaultGUI:
-    def __init__(self):
+    def __init__(self, storage_engine: str = "sqlite"):
         self.crypto_manager = CryptoManager()
         self.auth_manager = AuthManager(self.crypto_manager)
-        self.db_manager = None
-        self.vault = None
+        # Motor del almacén principal: "sqlite", "file" o "memory"
+        self.storage_engine = storage_engine
+        self.storage: Optional[StorageBackend] = None
         self.password_vars = {}  # Para manejar la visibilidad de las contraseñas
+        self.page_size = 100  # Credenciales mostradas por página
+        self.last_credential_id = None
+        self.load_more_button = None
 
         # Configuración de tema
         ctk.set_appearance_mode("dark")
@@ -63,6 +66,9 @@ class SecureVaultGUI:
         self.current_frame = None
         self.setup_login_frame()
 
+        # Escribir los cambios pendientes antes de cerrar la ventana
+        self.root.protocol("WM_DELETE_WINDOW", self.handle_close)
+
     def setup_login_frame(self):
         """Configura la pantalla de inicio de sesión."""
         if self.current_frame:
@@ -311,14 +317,9 @@ class SecureVaultGUI:
                     )
                     return
 
-                # Reiniciar los datos del usuario
+                # Reiniciar los datos del usuario (también elimina el vault y la base de datos anteriores)
                 self.auth_manager.reset_user_data(new_password)
                 
-                # Crear un nuevo vault vacío
-                self.vault = PasswordVault(self.crypto_manager)
-                self.vault.credentials = []
-                self.vault.save_vault()
-                
                 messagebox.showinfo(
                     "Éxito",
                     "Contraseña reiniciada correctamente.\nPor favor, inicia sesión con tu nueva contraseña."
@@ -528,7 +529,7 @@ class SecureVaultGUI:
             font=("Roboto", 14),
             fg_color="#404040",
             hover_color="#505050",
-            command=lambda: self.toggle_password_visibility(credential['id'], credential['password'])
+            command=lambda: self.toggle_password_visibility(credential['id'])
         )
         show_hide_btn.pack(side="right", padx=5)
         
@@ -540,7 +541,7 @@ class SecureVaultGUI:
             font=("Roboto", 14),
             fg_color="#404040",
             hover_color="#505050",
-            command=lambda: self.copy_to_clipboard(credential['password'])
+            command=lambda: self.copy_password(credential['id'])
         )
         copy_pass_btn.pack(side="right", padx=5)
 
@@ -576,14 +577,26 @@ class SecureVaultGUI:
 
         return card
 
-    def toggle_password_visibility(self, credential_id: int, password: str):
-        """Alterna la visibilidad de la contraseña."""
+    def toggle_password_visibility(self, credential_id: int):
+        """Alterna la visibilidad de la contraseña, desencriptándola solo al mostrarla."""
         current_value = self.password_vars[credential_id].get()
         if current_value == "•" * 12:
+            password = self.storage.reveal_password(credential_id)
+            if password is None:
+                messagebox.showerror("Error", "No se pudo desencriptar la contraseña")
+                return
             self.password_vars[credential_id].set(password)
         else:
             self.password_vars[credential_id].set("•" * 12)
 
+    def copy_password(self, credential_id: int):
+        """Desencripta bajo demanda una contraseña y la copia al portapapeles."""
+        password = self.storage.reveal_password(credential_id)
+        if password is None:
+            messagebox.showerror("Error", "No se pudo desencriptar la contraseña")
+            return
+        self.copy_to_clipboard(password)
+
     def show_add_credential_dialog(self):
         """Muestra el diálogo para agregar nuevas credenciales."""
         dialog = ctk.CTkToplevel(self.root)
@@ -1012,19 +1025,31 @@ class SecureVaultGUI:
         """Maneja el proceso de inicio de sesión."""
         password = self.password_entry.get()
         try:
+            # login() deriva la clave una sola vez e inicializa la encriptación
             if self.auth_manager.login(password):
-                # Inicializar la encriptación antes de crear el DatabaseManager
-                self.crypto_manager.initialize_encryption(password)
-                # Crear el DatabaseManager después de inicializar la encriptación
-                self.db_manager = DatabaseManager(self.crypto_manager)
-                # Crear y configurar el vault
-                self.vault = PasswordVault(self.crypto_manager)
-                self.setup_main_frame()
+                self.open_session()
             else:
                 messagebox.showerror("Error", "Contraseña incorrecta")
         except ValueError as e:
             messagebox.showerror("Error", str(e))
 
+    def open_session(self):
+        """Abre el almacén principal con la encriptación ya inicializada y muestra el dashboard."""
+        if self.storage:
+            self.storage.close()
+        self.storage = create_storage(self.storage_engine, self.crypto_manager)
+        if isinstance(self.storage, SQLiteStorage):
+            # Migración única del antiguo vault.enc a SQLite
+            try:
+                migrated = migrate_vault_to_sqlite(self.storage, self.crypto_manager)
+                if migrated:
+                    print(f"Credenciales migradas del vault: {migrated}")
+            except Exception as e:
+                print(f"Error al migrar el vault: {e}")
+        # Recuperar páginas libres en segundo plano mientras la app está inactiva
+        self.storage.start_maintenance()
+        self.setup_main_frame()
+
     def handle_register(self):
         """Maneja el proceso de registro."""
         password = self.password_entry.get()
@@ -1038,16 +1063,13 @@ class SecureVaultGUI:
                 )
                 return
 
+            # register_user() calibra la derivación e inicializa la encriptación
             if self.auth_manager.register_user(password):
-                # Inicializar el administrador de base de datos
-                self.crypto_manager.initialize_encryption(password)
-                self.db_manager = DatabaseManager(self.crypto_manager)
-                
                 messagebox.showinfo(
                     "Éxito",
                     "Usuario registrado correctamente.\nPor favor, guarda tu contraseña maestra en un lugar seguro."
                 )
-                self.handle_login()
+                self.open_session()
             else:
                 messagebox.showerror("Error", "Ya existe un usuario registrado")
         except ValueError as e:
@@ -1055,36 +1077,69 @@ class SecureVaultGUI:
 
     def handle_logout(self):
         """Maneja el proceso de cierre de sesión."""
-        self.vault = None
+        if self.storage:
+            # Borra las contraseñas desencriptadas en caché antes de cerrar
+            self.storage.clear_cache()
+            self.storage.close()
+            self.storage = None
+        self.password_vars = {}
         self.setup_login_frame()
 
+    def handle_close(self):
+        """Persiste los cambios pendientes y cierra la aplicación."""
+        if self.storage:
+            self.storage.close()
+        self.root.destroy()
+
     def refresh_credentials(self):
         """Actualiza la lista de credenciales mostradas."""
         # Limpia el frame de credenciales
         for widget in self.credentials_frame.winfo_children():
             widget.destroy()
+        self.password_vars = {}
+
+        # Muestra la primera página; el resto se carga bajo demanda
+        self.last_credential_id = None
+        self.load_more_button = None
+        self.load_more_credentials()
+
+    def load_more_credentials(self):
+        """Agrega la siguiente página de credenciales a la lista mostrada."""
+        if self.load_more_button:
+            self.load_more_button.destroy()
+            self.load_more_button = None
 
-        # Obtiene y muestra las credenciales
-        credentials = self.db_manager.get_credentials()
+        # Obtiene solo metadatos, sin desencriptar contraseñas
+        credentials = self.storage.get_credentials_page(self.last_credential_id, self.page_size)
         for cred in credentials:
             self.create_credential_card(cred)
 
+        if len(credentials) == self.page_size:
+            self.last_credential_id = credentials[-1]['id']
+            self.load_more_button = ctk.CTkButton(
+                self.credentials_frame,
+                text="⬇️ Cargar más",
+                command=self.load_more_credentials,
+                height=35,
+                font=("Roboto", 12),
+                fg_color="#333333",
+                hover_color="#444444"
+            )
+            self.load_more_button.pack(pady=10)
+
     def add_credential(self, website: str, username: str, password: str, dialog: ctk.CTkToplevel) -> bool:
-        """Agrega nuevas credenciales a la base de datos."""
+        """Agrega nuevas credenciales al almacén principal."""
         if not website or not username or not password:
             messagebox.showerror("Error", "Todos los campos son obligatorios")
             return False
 
         try:
-            # Verificar que el administrador de base de datos está inicializado
-            if not self.db_manager:
+            # Verificar que el almacén está abierto
+            if not self.storage:
                 raise ValueError("No hay una sesión activa. Por favor, inicia sesión nuevamente.")
 
             # Intentar agregar la credencial
-            if self.db_manager.add_credential(website, username, password):
-                # También agregar al vault para mantener la sincronización
-                if self.vault:
-                    self.vault.add_credentials(website, username, password)
+            if self.storage.add_credential(website, username, password):
                 self.refresh_credentials()
                 return True
             
@@ -1098,9 +1153,9 @@ class SecureVaultGUI:
         return False
 
     def delete_credential(self, credential_id: int):
-        """Elimina credenciales de la base de datos."""
+        """Elimina credenciales del almacén principal."""
         if messagebox.askyesno("Confirmar", "¿Estás seguro de eliminar esta credencial?"):
-            if self.db_manager.delete_credential(credential_id):
+            if self.storage.delete_credential(credential_id):
                 self.refresh_credentials()
             else:
                 messagebox.showerror("Error", "No se pudo eliminar la credencial")
@@ -1108,14 +1163,16 @@ class SecureVaultGUI:
     def search_credentials(self):
         """Busca credenciales según el texto ingresado."""
         query = self.search_entry.get().strip()
+        if not query:
+            self.refresh_credentials()
+            return
+
         for widget in self.credentials_frame.winfo_children():
             widget.destroy()
+        self.password_vars = {}
+        self.load_more_button = None
 
-        if query:
-            credentials = self.db_manager.search_credentials(query)
-        else:
-            credentials = self.db_manager.get_credentials()
-            
+        credentials = self.storage.list_credentials(query)
         for cred in credentials:
             self.create_credential_card(cred)
 
@@ -1228,7 +1285,7 @@ class SecureVaultGUI:
             border_color="#00FFE0",
             border_width=1
         )
-        password_entry.insert(0, credential['password'])
+        password_entry.insert(0, self.storage.reveal_password(credential['id']) or "")
         password_entry.pack(side="left")
 
         # Frame para botones de contraseña
@@ -1286,7 +1343,7 @@ class SecureVaultGUI:
                 return
             
             try:
-                if self.db_manager.update_credential(
+                if self.storage.update_credential(
                     credential['id'],
                     website_entry.get(),
                     username_entry.get(),
@@ -0,0 +1,108 @@
+import argparse
+import base64
+import hashlib
+import os
+import time
+from typing import Dict, List, Tuple
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+
+# Longitud de la clave derivada (bytes)
+KEY_LENGTH = 32
+ALGORITHMS = ("scrypt", "pbkdf2")
+# Derivación original (SHA-256 sin sal); solo se usa para abrir cuentas antiguas
+LEGACY_PARAMS = {"algorithm": "sha256"}
+
+# Límites de la calibración
+SCRYPT_MIN_N = 2 ** 14
+SCRYPT_MAX_N = 2 ** 20
+PBKDF2_MIN_ITERATIONS = 100_000
+
+
+def new_params(algorithm: str = "scrypt", **cost) -> Dict:
+    """Crea parámetros de derivación con una sal aleatoria nueva."""
+    salt = base64.b64encode(os.urandom(16)).decode()
+    if algorithm == "scrypt":
+        return {"algorithm": "scrypt", "salt": salt, "n": cost.get("n", 2 ** 15), "r": cost.get("r", 8), "p": cost.get("p", 1)}
+    if algorithm == "pbkdf2":
+        return {"algorithm": "pbkdf2", "salt": salt, "iterations": cost.get("iterations", 600_000)}
+    raise ValueError(f"Algoritmo de derivación no soportado: {algorithm}")
+
+
+def derive_key(password: str, params: Dict) -> bytes:
+    """Deriva una clave de KEY_LENGTH bytes a partir de la contraseña y los parámetros."""
+    algorithm = params["algorithm"]
+    if algorithm == "sha256":
+        return hashlib.sha256(password.encode()).digest()
+    salt = base64.b64decode(params["salt"])
+    if algorithm == "scrypt":
+        kdf = Scrypt(salt=salt, length=KEY_LENGTH, n=params["n"], r=params["r"], p=params["p"])
+    elif algorithm == "pbkdf2":
+        kdf = PBKDF2HMAC(algorithm=hashes.SHA256(), length=KEY_LENGTH, salt=salt, iterations=params["iterations"])
+    else:
+        raise ValueError(f"Algoritmo de derivación no soportado: {algorithm}")
+    return kdf.derive(password.encode())
+
+
+def _time_derivation(params: Dict) -> float:
+    start = time.perf_counter()
+    derive_key("calibration", params)
+    return time.perf_counter() - start
+
+
+def calibrate(algorithm: str = "scrypt", target_seconds: float = 0.5) -> Dict:
+    """Elige el coste que más se acerca a target_seconds por desbloqueo en esta máquina.
+
+    Para scrypt duplica N (memoria y tiempo) mientras la siguiente
+    duplicación siga dentro del objetivo; para PBKDF2 mide un número fijo
+    de iteraciones y escala linealmente. Nunca baja de los mínimos.
+    """
+    if algorithm == "scrypt":
+        n = SCRYPT_MIN_N
+        elapsed = _time_derivation(new_params("scrypt", n=n))
+        while n < SCRYPT_MAX_N and elapsed * 2 <= target_seconds:
+            n *= 2
+            elapsed = _time_derivation(new_params("scrypt", n=n))
+        return new_params("scrypt", n=n)
+    if algorithm == "pbkdf2":
+        sample = 50_000
+        elapsed = _time_derivation(new_params("pbkdf2", iterations=sample))
+        iterations = int(sample * target_seconds / elapsed)
+        return new_params("pbkdf2", iterations=max(PBKDF2_MIN_ITERATIONS, iterations))
+    raise ValueError(f"Algoritmo de derivación no soportado: {algorithm}")
+
+
+def benchmark(algorithm: str = "scrypt") -> List[Tuple[int, float]]:
+    """Mide el tiempo de derivación para una serie creciente de costes."""
+    if algorithm == "scrypt":
+        costs = [2 ** exponent for exponent in range(12, 19)]
+        return [(n, _time_derivation(new_params("scrypt", n=n))) for n in costs]
+    if algorithm == "pbkdf2":
+        costs = [50_000 * 2 ** step for step in range(6)]
+        return [(iterations, _time_derivation(new_params("pbkdf2", iterations=iterations))) for iterations in costs]
+    raise ValueError(f"Algoritmo de derivación no soportado: {algorithm}")
+
+
+def main() -> None:
+    """Comandos de consola: benchmark y calibrate."""
+    parser = argparse.ArgumentParser(description="Coste de derivación de la clave maestra")
+    parser.add_argument("command", choices=("benchmark", "calibrate"))
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="scrypt")
+    parser.add_argument("--target", type=float, default=0.5, help="Tiempo objetivo de desbloqueo en segundos")
+    args = parser.parse_args()
+
+    if args.command == "benchmark":
+        cost_name = "N" if args.algorithm == "scrypt" else "iteraciones"
+        print(f"{args.algorithm}: {cost_name} -> segundos")
+        for cost, elapsed in benchmark(args.algorithm):
+            print(f"{cost:>10}  {elapsed:.3f}")
+    else:
+        params = calibrate(args.algorithm, args.target)
+        elapsed = _time_derivation(params)
+        cost = {k: v for k, v in params.items() if k not in ("algorithm", "salt")}
+        print(f"{args.algorithm} {cost}: {elapsed:.3f}s por desbloqueo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from typing import Any, Dict, Optional
+
+
+class Credential:
+    """Registro compacto de una credencial, compartido por el vault y la base de datos.
+
+    Usa __slots__ para evitar un diccionario por instancia, lo que reduce
+    bastante la memoria con decenas de miles de credenciales. Admite el
+    acceso por clave (credential['website'], get()) de los diccionarios
+    que reemplaza; los campos que no vienen de la fuente quedan en None y
+    to_dict() los omite.
+    """
+
+    __slots__ = ("id", "website", "username", "password", "created_at", "updated_at", "change_seq")
+
+    def __init__(
+        self,
+        id: Optional[int],
+        website: str,
+        username: str,
+        password: Optional[str] = None,
+        created_at: Optional[str] = None,
+        updated_at: Optional[str] = None,
+        change_seq: Optional[int] = None
+    ):
+        self.id = id
+        self.website = website
+        self.username = username
+        self.password = password
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.change_seq = change_seq
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Credential":
+        """Crea una credencial a partir de un diccionario con las mismas claves (id puede faltar)."""
+        fields = {field: data[field] for field in cls.__slots__ if field in data}
+        fields.setdefault("id", None)
+        return cls(**fields)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte la credencial en diccionario, omitiendo los campos vacíos."""
+        data = {}
+        for field in self.__slots__:
+            value = getattr(self, field)
+            if value is not None:
+                data[field] = value
+        return data
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Equivalente a dict.get para los campos de la credencial."""
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Credential):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self) -> str:
+        return f"Credential(id={self.id!r}, website={self.website!r}, username={self.username!r})"
@@ -0,0 +1,201 @@
+import json
+import lzma
+import struct
+import sys
+import zlib
+from array import array
+from itertools import accumulate
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from models import Credential
+
+# Etiquetas de formato del contenido de la instantánea (flags de la cabecera)
+FORMAT_JSON = 0
+FORMAT_BINARY = 1
+FORMAT_NAMES = {"json": FORMAT_JSON, "binary": FORMAT_BINARY}
+# Los 4 bits bajos de los flags de la cabecera indican el formato
+FORMAT_MASK = 0x0F
+
+# Compresión previa a la encriptación, en los 4 bits altos de los flags
+COMPRESSION_NONE = 0x00
+COMPRESSION_ZLIB = 0x10
+COMPRESSION_LZMA = 0x20
+COMPRESSION_NAMES = {None: COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lzma": COMPRESSION_LZMA}
+COMPRESSION_MASK = 0xF0
+
+# Campos de texto de cada credencial, en el orden en que se guardan
+TEXT_FIELDS = ("website", "username", "password")
+
+# Estado del vault al inicio del contenido binario: seq y next_id
+_STATE = struct.Struct("<QQ")
+# Cabecera de cada lote binario: número de registros y tamaño en bytes
+_BATCH = struct.Struct("<II")
+# Los arrays se guardan en little-endian sin importar la plataforma
+_SWAP = sys.byteorder == "big"
+
+
+def encode_json(state: Dict, records: Iterable[Credential]) -> Iterator[bytes]:
+    """Codifica el estado y luego una credencial por línea JSON."""
+    yield json.dumps(state).encode() + b"\n"
+    for record in records:
+        yield json.dumps(record.to_dict()).encode() + b"\n"
+
+
+def _json_lines(chunks: Iterable[bytes]) -> Iterator[Dict]:
+    """Decodifica líneas JSON; las líneas completas de cada bloque se decodifican juntas."""
+    buffer = b""
+    for chunk in chunks:
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        if lines:
+            yield from json.loads(b"[" + b",".join(lines) + b"]")
+    if buffer:
+        yield json.loads(buffer)
+
+
+def decode_json(chunks: Iterable[bytes]) -> Iterator[Union[Dict, Credential]]:
+    """Decodifica líneas JSON; produce primero el estado y luego las credenciales."""
+    lines = _json_lines(chunks)
+    yield next(lines)
+    for line in lines:
+        yield Credential.from_dict(line)
+
+
+def _to_bytes(values: array) -> bytes:
+    if _SWAP:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if _SWAP:
+        values.byteswap()
+    return values
+
+
+def _encode_batch(batch: List[Credential]) -> bytes:
+    """Codifica un lote por columnas: ids, longitudes de cada campo y textos concatenados."""
+    parts = [_to_bytes(array("Q", [record.id for record in batch]))]
+    blobs = []
+    for field in TEXT_FIELDS:
+        encoded = [getattr(record, field).encode() for record in batch]
+        parts.append(_to_bytes(array("I", map(len, encoded))))
+        blobs.append(b"".join(encoded))
+    body = b"".join(parts + blobs)
+    return _BATCH.pack(len(batch), len(body)) + body
+
+
+def encode_binary(state: Dict, records: Iterable[Credential], batch_size: int = 1024) -> Iterator[bytes]:
+    """Codifica el estado y las credenciales en lotes binarios con prefijo de longitud."""
+    yield _STATE.pack(state["seq"], state["next_id"])
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield _encode_batch(batch)
+            batch = []
+    if batch:
+        yield _encode_batch(batch)
+
+
+def _split_column(blob: bytes, lengths: array) -> List[str]:
+    """Separa una columna de textos concatenados según sus longitudes en bytes."""
+    ends = list(accumulate(lengths))
+    starts = [0] + ends[:-1]
+    text = blob.decode()
+    if len(text) == len(blob):
+        # Solo ASCII: los desplazamientos en bytes coinciden con los de caracteres
+        return [text[start:end] for start, end in zip(starts, ends)]
+    return [blob[start:end].decode() for start, end in zip(starts, ends)]
+
+
+def _decode_batch(count: int, body: bytes) -> List[Credential]:
+    """Decodifica un lote generado por _encode_batch."""
+    offset = count * 8
+    ids = _from_bytes("Q", body[:offset])
+    lengths = []
+    for _ in TEXT_FIELDS:
+        lengths.append(_from_bytes("I", body[offset:offset + count * 4]))
+        offset += count * 4
+    columns = []
+    for field_lengths in lengths:
+        size = sum(field_lengths)
+        columns.append(_split_column(body[offset:offset + size], field_lengths))
+        offset += size
+    if offset != len(body):
+        raise ValueError("Lote binario dañado")
+    return list(map(Credential, ids, *columns))
+
+
+def decode_binary(chunks: Iterable[bytes]) -> Iterator[Union[Dict, Credential]]:
+    """Decodifica el formato binario; produce primero el estado y luego las credenciales."""
+    buffer = bytearray()
+    state_sent = False
+    for chunk in chunks:
+        buffer += chunk
+        if not state_sent:
+            if len(buffer) < _STATE.size:
+                continue
+            seq, next_id = _STATE.unpack_from(buffer)
+            del buffer[:_STATE.size]
+            state_sent = True
+            yield {"seq": seq, "next_id": next_id}
+        while len(buffer) >= _BATCH.size:
+            count, size = _BATCH.unpack_from(buffer)
+            if len(buffer) < _BATCH.size + size:
+                break
+            body = bytes(buffer[_BATCH.size:_BATCH.size + size])
+            del buffer[:_BATCH.size + size]
+            yield from _decode_batch(count, body)
+    if not state_sent or buffer:
+        raise ValueError("Contenido binario incompleto")
+
+
+ENCODERS = {FORMAT_JSON: encode_json, FORMAT_BINARY: encode_binary}
+DECODERS = {FORMAT_JSON: decode_json, FORMAT_BINARY: decode_binary}
+
+
+def _compressor(compression: int, level: Optional[int]):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+    if compression == COMPRESSION_LZMA:
+        return lzma.LZMACompressor(preset=lzma.PRESET_DEFAULT if level is None else level)
+    raise ValueError(f"Compresión no soportada: {compression}")
+
+
+def _decompressor(compression: int):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompressobj()
+    if compression == COMPRESSION_LZMA:
+        return lzma.LZMADecompressor()
+    raise ValueError(f"Compresión no soportada: {compression}")
+
+
+def compress_chunks(chunks: Iterable[bytes], compression: int, level: Optional[int] = None) -> Iterator[bytes]:
+    """Comprime un flujo de bloques de forma incremental."""
+    if compression == COMPRESSION_NONE:
+        yield from chunks
+        return
+    compressor = _compressor(compression, level)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def decompress_chunks(chunks: Iterable[bytes], compression: int) -> Iterator[bytes]:
+    """Descomprime un flujo de bloques de forma incremental."""
+    if compression == COMPRESSION_NONE:
+        yield from chunks
+        return
+    decompressor = _decompressor(compression)
+    for chunk in chunks:
+        data = decompressor.decompress(chunk)
+        if data:
+            yield data
+    if not decompressor.eof:
+        raise ValueError("Contenido comprimido incompleto")
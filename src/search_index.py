@@ -0,0 +1,61 @@
+from typing import Dict, Hashable, Optional, Set
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigramas distintos de un texto (ya normalizado)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TrigramIndex:
+    """Índice invertido de trigramas en memoria para búsquedas por subcadena.
+
+    Cada trigrama apunta al conjunto de claves cuyo texto lo contiene. Una
+    consulta intersecta los conjuntos de sus trigramas, empezando por el
+    más pequeño, y devuelve candidatos que el llamador debe verificar con
+    una comparación de subcadena (los trigramas pueden coincidir en
+    posiciones distintas). Los textos se comparan en minúsculas.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Set[Hashable]] = {}
+
+    def add(self, key: Hashable, text: str) -> None:
+        """Indexa el texto de una clave."""
+        for gram in trigrams(text.lower()):
+            posting = self._postings.get(gram)
+            if posting is None:
+                self._postings[gram] = {key}
+            else:
+                posting.add(key)
+
+    def remove(self, key: Hashable, text: str) -> None:
+        """Quita del índice el texto con el que se indexó una clave."""
+        for gram in trigrams(text.lower()):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self._postings[gram]
+
+    def candidates(self, query: str) -> Optional[Set[Hashable]]:
+        """Claves que contienen todos los trigramas de la consulta.
+
+        Devuelve None si la consulta tiene menos de tres caracteres y no
+        puede resolverse con el índice.
+        """
+        grams = trigrams(query.lower())
+        if not grams:
+            return None
+        postings = []
+        for gram in grams:
+            posting = self._postings.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+            if not result:
+                break
+        return result
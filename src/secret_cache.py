@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+class SecretCache:
+    """Caché LRU acotada en tamaño y tiempo para secretos desencriptados.
+
+    Cada entrada se guarda como bytearray junto con una versión (por
+    ejemplo, el número de cambio de la fila), de modo que una versión
+    distinta cuenta como fallo. Al expulsar, invalidar o vaciar la caché,
+    los bytes se sobrescriben con ceros antes de soltarlos. Las cadenas
+    devueltas por get() son copias inmutables fuera del control de la caché.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, bytearray, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _zeroize(buffer: bytearray) -> None:
+        """Sobrescribe el contenido de un buffer con ceros."""
+        for i in range(len(buffer)):
+            buffer[i] = 0
+
+    def _discard(self, key: Hashable) -> None:
+        """Elimina una entrada y borra su contenido. Requiere tener el lock."""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._zeroize(entry[1])
+
+    def get(self, key: Hashable, version: Hashable) -> Optional[str]:
+        """Devuelve el secreto si está en caché, vigente y con la misma versión."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry_version, buffer, expires_at = entry
+            if entry_version != version or expires_at < time.monotonic():
+                self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return buffer.decode()
+
+    def put(self, key: Hashable, version: Hashable, secret: str) -> None:
+        """Guarda un secreto, expulsando las entradas menos usadas si hace falta."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (version, bytearray(secret.encode()), time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Elimina un secreto de la caché."""
+        with self._lock:
+            self._discard(key)
+
+    def clear(self) -> None:
+        """Vacía la caché borrando todos los secretos."""
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de uso de la caché."""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
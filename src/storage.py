@@ -0,0 +1,298 @@
+import glob
+import heapq
+import json
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional
+from crypto_utils import CryptoManager
+from database import DatabaseManager
+from models import Credential
+from vault import PasswordVault
+
+
+def _metadata(credential: Credential) -> Credential:
+    """Copia de una credencial sin la contraseña."""
+    return Credential(credential.id, credential.website, credential.username)
+
+
+def _copy(credential: Credential, with_password: bool) -> Credential:
+    if with_password:
+        return Credential(credential.id, credential.website, credential.username, credential.password)
+    return _metadata(credential)
+
+
+def _page(credentials: Iterable[Credential], after_id: Optional[int], limit: int) -> List[Credential]:
+    """Página de metadatos ordenada por id, posterior a after_id."""
+    if after_id is not None:
+        credentials = (c for c in credentials if c.id > after_id)
+    return [_metadata(c) for c in heapq.nsmallest(limit, credentials, key=lambda c: c.id)]
+
+
+def _batches(credentials: List[Credential], batch_size: int, with_passwords: bool) -> Iterator[Credential]:
+    """Recorre copias de las credenciales en orden de id, un lote a la vez."""
+    ordered = sorted(credentials, key=lambda c: c.id)
+    for start in range(0, len(ordered), batch_size):
+        for credential in ordered[start:start + batch_size]:
+            yield _copy(credential, with_passwords)
+
+
+class StorageBackend(ABC):
+    """Interfaz común de los almacenes de credenciales.
+
+    La interfaz gráfica trabaja con un único almacén principal. Los
+    listados devuelven solo metadatos (password en None); las contraseñas
+    se obtienen una a una con reveal_password.
+    """
+
+    @abstractmethod
+    def add_credential(self, website: str, username: str, password: str) -> bool:
+        """Agrega una nueva credencial."""
+
+    @abstractmethod
+    def update_credential(self, credential_id: int, website: str, username: str, password: str) -> bool:
+        """Actualiza una credencial existente."""
+
+    @abstractmethod
+    def delete_credential(self, credential_id: int) -> bool:
+        """Elimina una credencial."""
+
+    @abstractmethod
+    def get_credentials_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Credential]:
+        """Obtiene una página de metadatos ordenada por id."""
+
+    @abstractmethod
+    def list_credentials(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Credential]:
+        """Obtiene los metadatos de las credenciales que coinciden con la consulta."""
+
+    @abstractmethod
+    def reveal_password(self, credential_id: int) -> Optional[str]:
+        """Obtiene la contraseña de una sola credencial."""
+
+    @abstractmethod
+    def iter_credentials(self, batch_size: int = 500, with_passwords: bool = False) -> Iterator[Credential]:
+        """Recorre todas las credenciales en orden de id."""
+
+    def start_maintenance(self) -> None:
+        """Inicia las tareas de mantenimiento en segundo plano, si el almacén las tiene."""
+
+    def clear_cache(self) -> None:
+        """Borra los secretos desencriptados que el almacén tenga en caché."""
+
+    def flush(self) -> None:
+        """Persiste los cambios pendientes."""
+
+    def close(self) -> None:
+        """Persiste los cambios pendientes y libera los recursos."""
+        self.flush()
+
+
+class SQLiteStorage(StorageBackend):
+    """Almacén sobre la base de datos SQLite (DatabaseManager)."""
+
+    def __init__(self, crypto_manager: CryptoManager, db_path: Optional[str] = None):
+        self.db_manager = DatabaseManager(crypto_manager, db_path)
+
+    def add_credential(self, website: str, username: str, password: str) -> bool:
+        return self.db_manager.add_credential(website, username, password)
+
+    def update_credential(self, credential_id: int, website: str, username: str, password: str) -> bool:
+        return self.db_manager.update_credential(credential_id, website, username, password)
+
+    def delete_credential(self, credential_id: int) -> bool:
+        return self.db_manager.delete_credential(credential_id)
+
+    def get_credentials_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Credential]:
+        return self.db_manager.get_credentials_page(after_id, limit)
+
+    def list_credentials(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Credential]:
+        return self.db_manager.list_credentials(query, limit)
+
+    def reveal_password(self, credential_id: int) -> Optional[str]:
+        return self.db_manager.reveal_password(credential_id)
+
+    def iter_credentials(self, batch_size: int = 500, with_passwords: bool = False) -> Iterator[Credential]:
+        return self.db_manager.iter_credentials(batch_size, with_passwords)
+
+    def add_credentials_bulk(self, credentials: Iterable[Credential]) -> Dict:
+        """Agrega muchas credenciales en una sola transacción."""
+        return self.db_manager.add_credentials_bulk(credentials)
+
+    def start_maintenance(self) -> None:
+        self.db_manager.start_maintenance()
+
+    def clear_cache(self) -> None:
+        self.db_manager.secret_cache.clear()
+
+    def close(self) -> None:
+        self.db_manager.close()
+
+
+class MemoryStorage(StorageBackend):
+    """Almacén en memoria, sin persistencia (pruebas y sesiones efímeras)."""
+
+    def __init__(self):
+        self._by_id: Dict[int, Credential] = {}
+        self._next_id = 1
+
+    def add_credential(self, website: str, username: str, password: str) -> bool:
+        self._by_id[self._next_id] = Credential(self._next_id, website, username, password)
+        self._next_id += 1
+        return True
+
+    def update_credential(self, credential_id: int, website: str, username: str, password: str) -> bool:
+        credential = self._by_id.get(credential_id)
+        if credential is None:
+            return False
+        credential.website = website
+        credential.username = username
+        credential.password = password
+        return True
+
+    def delete_credential(self, credential_id: int) -> bool:
+        return self._by_id.pop(credential_id, None) is not None
+
+    def get_credentials_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Credential]:
+        return _page(self._by_id.values(), after_id, limit)
+
+    def list_credentials(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Credential]:
+        credentials = self._by_id.values()
+        if query:
+            query = query.lower()
+            credentials = [
+                c for c in credentials
+                if query in c.website.lower() or query in c.username.lower()
+            ]
+        return [_metadata(c) for c in list(credentials)[:limit]]
+
+    def reveal_password(self, credential_id: int) -> Optional[str]:
+        credential = self._by_id.get(credential_id)
+        return credential.password if credential else None
+
+    def iter_credentials(self, batch_size: int = 500, with_passwords: bool = False) -> Iterator[Credential]:
+        return _batches(list(self._by_id.values()), batch_size, with_passwords)
+
+
+class EncryptedFileStorage(StorageBackend):
+    """Almacén sobre el archivo encriptado vault.enc (PasswordVault)."""
+
+    def __init__(self, crypto_manager: CryptoManager, vault_file: Optional[str] = None):
+        self.vault = PasswordVault(crypto_manager, vault_file)
+        self.vault.load_vault()
+
+    def add_credential(self, website: str, username: str, password: str) -> bool:
+        self.vault.add_credentials(website, username, password)
+        return True
+
+    def update_credential(self, credential_id: int, website: str, username: str, password: str) -> bool:
+        return self.vault.update_credentials(credential_id, website, username, password)
+
+    def delete_credential(self, credential_id: int) -> bool:
+        return self.vault.delete_credentials(credential_id)
+
+    def get_credentials_page(self, after_id: Optional[int] = None, limit: int = 100) -> List[Credential]:
+        return _page(self.vault.credentials, after_id, limit)
+
+    def list_credentials(self, query: Optional[str] = None, limit: Optional[int] = None) -> List[Credential]:
+        credentials = self.vault.search_credentials(query) if query else self.vault.credentials
+        return [_metadata(c) for c in credentials[:limit]]
+
+    def reveal_password(self, credential_id: int) -> Optional[str]:
+        credential = self.vault.get_credential(credential_id)
+        return credential.password if credential else None
+
+    def iter_credentials(self, batch_size: int = 500, with_passwords: bool = False) -> Iterator[Credential]:
+        return _batches(self.vault.credentials, batch_size, with_passwords)
+
+    def flush(self) -> None:
+        self.vault.flush()
+
+
+# Motores disponibles para el almacén principal
+ENGINES = {
+    "sqlite": SQLiteStorage,
+    "file": EncryptedFileStorage,
+    "memory": MemoryStorage,
+}
+
+
+def create_storage(engine: str, crypto_manager: CryptoManager) -> StorageBackend:
+    """Crea el almacén principal configurado."""
+    if engine not in ENGINES:
+        raise ValueError(f"Motor de almacenamiento no soportado: {engine}")
+    if engine == "memory":
+        return MemoryStorage()
+    return ENGINES[engine](crypto_manager)
+
+
+def _entry_key(crypto_manager: CryptoManager, credential: Credential) -> str:
+    """Índice ciego del sitio y el usuario, para detectar duplicados sin guardarlos en claro."""
+    return crypto_manager.blind_index(json.dumps([credential.website, credential.username]))
+
+
+def _archive_vault(vault_file: str) -> None:
+    """Renombra la instantánea, el registro y los fragmentos del vault con el sufijo .migrated."""
+    for path in [vault_file] + glob.glob(vault_file + ".*"):
+        if os.path.exists(path) and not path.endswith(".migrated"):
+            os.replace(path, path + ".migrated")
+
+
+def migrate_vault_to_sqlite(
+    storage: SQLiteStorage,
+    crypto_manager: CryptoManager,
+    vault_file: Optional[str] = None,
+    batch_size: int = 500
+) -> int:
+    """Migra una sola vez el contenido de vault.enc a SQLite.
+
+    SQLite es la fuente de verdad. Las versiones anteriores escribían las
+    altas en ambos almacenes pero las modificaciones y bajas solo en
+    SQLite, así que si SQLite ya tiene credenciales el vault solo
+    contiene copias antiguas: se archiva sin importar nada, para no
+    resucitar credenciales eliminadas ni contraseñas cambiadas.
+
+    Si SQLite está vacío, el vault se recorre bloque a bloque sin cargarlo
+    completo y sus credenciales se insertan en lotes de batch_size, cada
+    uno en su propia transacción. El ajuste vault_migration marca la
+    importación en curso: si se interrumpe, la siguiente ejecución la
+    continúa omitiendo las credenciales cuyo sitio y usuario ya están en
+    SQLite (comparadas por índice ciego, nunca en claro). Al terminar sin
+    fallos, los archivos del vault se renombran con el sufijo .migrated.
+    Devuelve el número de credenciales migradas.
+    """
+    vault_file = vault_file or os.path.join("data", "vault.enc")
+    # Instantánea, registro de mutaciones y fragmentos que aún no se migraron
+    paths = [
+        path for path in [vault_file] + glob.glob(vault_file + ".*")
+        if os.path.exists(path) and not path.endswith(".migrated")
+    ]
+    if not paths:
+        return 0
+    db_manager = storage.db_manager
+    resuming = db_manager.get_setting('vault_migration') == 'importing'
+    existing = {_entry_key(crypto_manager, credential) for credential in storage.iter_credentials(batch_size)}
+    if existing and not resuming:
+        _archive_vault(vault_file)
+        return 0
+    db_manager.set_setting('vault_migration', 'importing')
+    vault = PasswordVault(crypto_manager, vault_file, write_window=0)
+    migrated = 0
+    failed = []
+    batch: List[Credential] = []
+    for credential in vault.iter_records():
+        if _entry_key(crypto_manager, credential) in existing:
+            continue
+        batch.append(credential)
+        if len(batch) >= batch_size:
+            result = storage.add_credentials_bulk(batch)
+            migrated += result['written']
+            failed.extend(result['failed'])
+            batch = []
+    if batch:
+        result = storage.add_credentials_bulk(batch)
+        migrated += result['written']
+        failed.extend(result['failed'])
+    if failed:
+        raise ValueError(f"No se pudieron migrar {len(failed)} credenciales del vault")
+    _archive_vault(vault_file)
+    db_manager.set_setting('vault_migration', None)
+    return migrated
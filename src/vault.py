@@ -1,77 +1,584 @@
 import json
 import os
-from typing import Dict, List, Optional
-from crypto_utils import CryptoManager
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from crypto_utils import STREAM_HEADER, CryptoManager
+from models import Credential
+from search_index import TrigramIndex
+from record_codec import (
+    COMPRESSION_MASK, COMPRESSION_NAMES, DECODERS, ENCODERS, FORMAT_JSON, FORMAT_MASK, FORMAT_NAMES,
+    compress_chunks, decompress_chunks
+)
+from file_utils import WriteBehind, atomic_write, atomic_write_stream, durable_append
 
 class PasswordVault:
-    def __init__(self, crypto_manager: CryptoManager):
+    def __init__(
+        self,
+        crypto_manager: CryptoManager,
+        vault_file: Optional[str] = None,
+        compaction_ratio: float = 1.0,
+        min_compaction_bytes: int = 64 * 1024,
+        write_window: float = 0.25,
+        chunk_size: int = 64 * 1024,
+        payload_format: str = "binary",
+        compression: Optional[str] = None,
+        compression_level: Optional[int] = None,
+        shards: int = 1,
+        reshard_threshold: Optional[int] = 10000
+    ):
         self.crypto_manager = crypto_manager
-        self.vault_file = os.path.join("data", "vault.enc")
-        self.credentials: List[Dict] = []
+        self.vault_file = vault_file or os.path.join("data", "vault.enc")
+        # Registro de mutaciones encriptadas individualmente, aplicado sobre la instantánea
+        self.journal_file = self.vault_file + ".journal"
+        # Se compacta cuando el registro supera compaction_ratio veces la instantánea
+        self.compaction_ratio = compaction_ratio
+        self.min_compaction_bytes = min_compaction_bytes
+        # Tamaño de los bloques encriptados de la instantánea
+        self.chunk_size = chunk_size
+        # Codificación del contenido de la instantánea: "json" o "binary"
+        if payload_format not in FORMAT_NAMES:
+            raise ValueError(f"Formato de vault no soportado: {payload_format}")
+        self.payload_format = payload_format
+        # Compresión opcional antes de encriptar: None, "zlib" o "lzma"
+        if compression not in COMPRESSION_NAMES:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        self.compression = compression
+        self.compression_level = compression_level
+        # Con más de un fragmento, vault_file es un manifiesto encriptado y las
+        # credenciales se reparten por hash de id en archivos independientes
+        if shards < 1:
+            raise ValueError("El número de fragmentos debe ser al menos 1")
+        self.shards = shards
+        # Se duplica el número de fragmentos cuando el promedio por fragmento lo supera
+        self.reshard_threshold = reshard_threshold
+        # Nombre del archivo de cada fragmento según el manifiesto
+        self._shard_files: List[Optional[str]] = []
+        self._generation = 0
+        # Fragmentos con cambios que aún no están en su archivo
+        self._dirty = set(range(shards))
+        # Credenciales indexadas por id; el dict conserva el orden de inserción
+        self._by_id: Dict[int, Credential] = {}
+        # Índices de trigramas de sitio web y usuario; se crean en la primera búsqueda
+        # y desde entonces se mantienen en cada mutación
+        self._website_index: Optional[TrigramIndex] = None
+        self._username_index: Optional[TrigramIndex] = None
+        # Próximo id a asignar; nunca se reutilizan ids de credenciales eliminadas
+        self.next_id = 1
+        # Número de secuencia de la última mutación aplicada
+        self.seq = 0
+        # Registros encriptados pendientes de escribir; se agrupan durante write_window segundos
+        self._pending: List[bytes] = []
+        self._lock = threading.RLock()
+        self._writer = WriteBehind(self.flush, write_window)
+
+    @property
+    def credentials(self) -> List[Credential]:
+        """Lista ordenada de credenciales."""
+        return list(self._by_id.values())
+
+    @credentials.setter
+    def credentials(self, credentials: List[Union[Credential, Dict]]) -> None:
+        self._by_id = {}
+        self._drop_search_index()
+        self.next_id = 1
+        self._insert_all(
+            Credential.from_dict(credential) if isinstance(credential, dict) else credential
+            for credential in credentials
+        )
+        self._dirty = set(range(self.shards))
+
+    def _shard_of(self, credential_id: int) -> int:
+        """Fragmento de una credencial: hash multiplicativo del id."""
+        return (credential_id * 0x9E3779B1) % (1 << 32) % self.shards
+
+    def _mark_dirty(self, credential_id: int) -> None:
+        self._dirty.add(self._shard_of(credential_id))
+
+    def _insert(self, credential: Credential) -> bool:
+        """Inserta una credencial en el índice.
+
+        Si el id falta o ya está en uso, se le asigna uno nuevo. Devuelve
+        True cuando hubo que reparar el id.
+        """
+        credential_id = credential.id
+        repaired = not isinstance(credential_id, int) or credential_id in self._by_id
+        if repaired:
+            credential.id = credential_id = self.next_id
+        self._by_id[credential_id] = credential
+        self._index_add(credential)
+        self.next_id = max(self.next_id, credential_id + 1)
+        return repaired
+
+    def _insert_all(self, credentials: Iterable[Credential]) -> bool:
+        """Inserta credenciales cargadas; devuelve True si hubo que reparar ids.
+
+        Los ids que faltan o están repetidos se asignan al terminar, a partir
+        del mayor id cargado, para no ocupar el de una credencial posterior.
+        """
+        unassigned = []
+        for credential in credentials:
+            if isinstance(credential.id, int) and credential.id not in self._by_id:
+                self._insert(credential)
+            else:
+                unassigned.append(credential)
+        for credential in unassigned:
+            self._insert(credential)
+        return bool(unassigned)
 
     def load_vault(self) -> None:
-        """Carga las credenciales encriptadas desde el archivo."""
-        if os.path.exists(self.vault_file):
-            with open(self.vault_file, "rb") as f:
-                encrypted_data = f.read()
-                if encrypted_data:
-                    decrypted_data = self.crypto_manager.decrypt_data(encrypted_data)
-                    self.credentials = json.loads(decrypted_data)
-                else:
-                    self.credentials = []
+        """Carga la instantánea encriptada y reproduce el registro de mutaciones."""
+        with self._lock:
+            # Las mutaciones aún no escritas se persisten antes de recargar
+            self.flush()
+            self._by_id = {}
+            self._drop_search_index()
+            self.next_id = 1
+            self.seq = 0
+            self._shard_files = []
+            self._dirty = set()
+            repaired = False
+            upgrade = False
+            if os.path.exists(self.vault_file):
+                with open(self.vault_file, "rb") as f:
+                    header = f.read(STREAM_HEADER.size)
+                    f.seek(0)
+                    if self.crypto_manager.is_stream(header):
+                        repaired = self._load_stream(f)
+                    else:
+                        repaired = self._load_legacy(f.read())
+                        upgrade = True
+            # Una instantánea de un solo archivo se reparte si se configuraron fragmentos
+            reshard = not self._shard_files and self.shards > 1
+            repaired = self._replay_journal() or repaired
+            if repaired or reshard:
+                self._dirty = set(range(self.shards))
+            if repaired or upgrade or reshard:
+                # Se persisten los ids reparados y se migra al formato actual
+                self.save_vault()
+
+    def _open_records(self, source: BinaryIO) -> Iterator[Union[Dict, Credential]]:
+        """Decodifica un archivo en formato por bloques según los flags de su cabecera.
+
+        Produce primero el estado guardado y luego cada credencial, de modo
+        que nunca se tiene en memoria el archivo completo desencriptado.
+        """
+        flags = self.crypto_manager.stream_flags(source.read(STREAM_HEADER.size))
+        source.seek(-STREAM_HEADER.size, os.SEEK_CUR)
+        decoder = DECODERS.get(flags & FORMAT_MASK)
+        if decoder is None:
+            raise ValueError(f"Formato de contenido no soportado: {flags & FORMAT_MASK}")
+        chunks = decompress_chunks(self.crypto_manager.decrypt_stream(source), flags & COMPRESSION_MASK)
+        return decoder(chunks)
+
+    def _load_stream(self, source: BinaryIO) -> bool:
+        """Carga una instantánea o un manifiesto de fragmentos; True si se repararon ids."""
+        records = self._open_records(source)
+        state = next(records)
+        self.seq = state["seq"]
+        self.next_id = state["next_id"]
+        if "files" in state:
+            return self._load_shards(state)
+        return self._insert_all(records)
+
+    def _shard_path(self, name: str) -> str:
+        return os.path.join(os.path.dirname(os.path.abspath(self.vault_file)), name)
+
+    def _read_shard(self, name: str) -> List[Credential]:
+        """Lee y desencripta las credenciales de un fragmento."""
+        with open(self._shard_path(name), "rb") as f:
+            records = self._open_records(f)
+            next(records)
+            return list(records)
+
+    def _map_shards(self, func: Callable, items: List) -> List:
+        """Aplica func a cada elemento en paralelo, un hilo por fragmento hasta el número de CPUs."""
+        workers = min(len(items), os.cpu_count() or 1)
+        if workers <= 1:
+            return [func(item) for item in items]
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="vault-shard") as pool:
+            return list(pool.map(func, items))
+
+    def _load_shards(self, manifest: Dict) -> bool:
+        """Carga en paralelo los fragmentos listados en el manifiesto."""
+        self.shards = manifest["shards"]
+        self._generation = manifest["generation"]
+        self._shard_files = manifest["files"]
+        credentials = [c for shard in self._map_shards(self._read_shard, self._shard_files) for c in shard]
+        credentials.sort(key=lambda c: c.id)
+        return self._insert_all(credentials)
+
+    def _load_legacy(self, encrypted_data: bytes) -> bool:
+        """Carga una instantánea antigua encriptada como un único token Fernet."""
+        if not encrypted_data:
+            return False
+        snapshot = json.loads(self.crypto_manager.decrypt_data(encrypted_data))
+        if isinstance(snapshot, list):
+            # Formato original: solo la lista de credenciales
+            stored = snapshot
         else:
-            self.credentials = []
+            stored = snapshot["credentials"]
+            self.seq = snapshot["seq"]
+            self.next_id = snapshot.get("next_id", 1)
+        return self._insert_all(Credential.from_dict(credential) for credential in stored)
+
+    def _replay_journal(self) -> bool:
+        """Aplica las mutaciones del registro posteriores a la instantánea.
+
+        Devuelve True si alguna credencial necesitó un id nuevo.
+        """
+        if not os.path.exists(self.journal_file):
+            return False
+        repaired = False
+        valid_size = 0
+        with open(self.journal_file, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Escritura interrumpida: se descarta la cola incompleta
+                    break
+                valid_size += len(line)
+                record = self._decode_journal_line(line)
+                if record is None or record["seq"] <= self.seq:
+                    continue
+                repaired = self._apply(record) or repaired
+                self.seq = record["seq"]
+        if valid_size < os.path.getsize(self.journal_file):
+            with open(self.journal_file, "r+b") as f:
+                f.truncate(valid_size)
+        return repaired
+
+    def _decode_journal_line(self, line: bytes) -> Optional[Dict]:
+        """Desencripta una línea completa del registro; None si está vacía o dañada."""
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(self.crypto_manager.decrypt_data(line))
+        except Exception as e:
+            # Registro dañado o encriptado con otra clave
+            print(f"Registro del vault ignorado: {e}")
+            return None
+
+    def iter_records(self) -> Iterator[Credential]:
+        """Recorre las credenciales guardadas sin cargar el vault en memoria.
+
+        La instantánea (o cada fragmento, uno a la vez) se desencripta bloque
+        a bloque y se le aplican las mutaciones del registro, que sí se
+        leen completas porque la compactación limita su tamaño. Los ids no
+        se reparan y el estado del vault no se modifica.
+        """
+        self.flush()
+        if not os.path.exists(self.vault_file) and not os.path.exists(self.journal_file):
+            return
+        source = open(self.vault_file, "rb") if os.path.exists(self.vault_file) else None
+        try:
+            snapshot_seq, records = 0, iter(())
+            if source is not None:
+                header = source.read(STREAM_HEADER.size)
+                source.seek(0)
+                if self.crypto_manager.is_stream(header):
+                    records = self._open_records(source)
+                    state = next(records)
+                    snapshot_seq = state["seq"]
+                    if "files" in state:
+                        records = self._iter_shard_files(state["files"])
+                else:
+                    # Formato antiguo: un único token que se desencripta completo
+                    legacy = PasswordVault(self.crypto_manager, self.vault_file, write_window=0)
+                    legacy._load_legacy(source.read())
+                    snapshot_seq, records = legacy.seq, iter(legacy.credentials)
+            changes, added = self._journal_overlay(snapshot_seq)
+            for credential in records:
+                if credential.id in changes:
+                    credential = changes[credential.id]
+                if credential is not None:
+                    yield credential
+            for credential in added.values():
+                if credential is not None:
+                    yield credential
+        finally:
+            if source is not None:
+                source.close()
+
+    def _iter_shard_files(self, files: List[Optional[str]]) -> Iterator[Credential]:
+        for name in files:
+            if name:
+                with open(self._shard_path(name), "rb") as f:
+                    records = self._open_records(f)
+                    next(records)
+                    yield from records
+
+    def _journal_overlay(self, snapshot_seq: int) -> Tuple[Dict[int, Optional[Credential]], Dict[int, Optional[Credential]]]:
+        """Mutaciones del registro posteriores a snapshot_seq, por id.
+
+        Devuelve los cambios sobre credenciales de la instantánea y las
+        credenciales agregadas en el registro; None marca una eliminación.
+        """
+        changes: Dict[int, Optional[Credential]] = {}
+        added: Dict[int, Optional[Credential]] = {}
+        if not os.path.exists(self.journal_file):
+            return changes, added
+        with open(self.journal_file, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                record = self._decode_journal_line(line)
+                if record is None or record["seq"] <= snapshot_seq:
+                    continue
+                if record["op"] == "add":
+                    credential = Credential.from_dict(record["credential"])
+                    added[credential.id] = credential
+                    continue
+                if record["op"] == "update":
+                    credential_id, credential = record["credential"]["id"], Credential.from_dict(record["credential"])
+                else:
+                    credential_id, credential = record["id"], None
+                target = added if credential_id in added else changes
+                target[credential_id] = credential
+        return changes, added
+
+    def _apply(self, record: Dict) -> bool:
+        """Aplica una mutación del registro; devuelve True si hubo que reparar un id."""
+        if record["op"] == "add":
+            credential = Credential.from_dict(record["credential"])
+            repaired = self._insert(credential)
+            self._mark_dirty(credential.id)
+            return repaired
+        if record["op"] == "update":
+            cred = self._by_id.get(record["credential"]["id"])
+            if cred is not None:
+                self._index_remove(cred)
+                for field in ("website", "username", "password"):
+                    setattr(cred, field, record["credential"][field])
+                self._index_add(cred)
+                self._mark_dirty(cred.id)
+        elif record["op"] == "delete":
+            cred = self._by_id.pop(record["id"], None)
+            if cred is not None:
+                self._index_remove(cred)
+                self._mark_dirty(record["id"])
+        return False
+
+    def _write_records(self, path: str, state: Dict, records: Iterable[Credential], payload_format: Optional[int] = None) -> None:
+        """Codifica, comprime y encripta registros en un archivo, de forma atómica."""
+        if payload_format is None:
+            payload_format = FORMAT_NAMES[self.payload_format]
+        compression = COMPRESSION_NAMES[self.compression]
+        payload = ENCODERS[payload_format](state, records)
+        payload = compress_chunks(payload, compression, self.compression_level)
+        atomic_write_stream(path, self.crypto_manager.encrypt_stream(payload, self.chunk_size, payload_format | compression))
 
     def save_vault(self) -> None:
-        """Guarda las credenciales encriptadas en el archivo."""
-        encrypted_data = self.crypto_manager.encrypt_data(json.dumps(self.credentials))
-        os.makedirs(os.path.dirname(self.vault_file), exist_ok=True)
-        with open(self.vault_file, "wb") as f:
-            f.write(encrypted_data)
+        """Guarda de forma atómica la instantánea y vacía el registro.
+
+        Con fragmentos solo se reescriben los que tienen cambios.
+        """
+        with self._lock:
+            if self.reshard_threshold:
+                while len(self._by_id) > self.reshard_threshold * self.shards:
+                    self.shards *= 2
+                    self._dirty = set(range(self.shards))
+            state = {"seq": self.seq, "next_id": self.next_id}
+            if self.shards == 1:
+                self._write_records(self.vault_file, state, list(self._by_id.values()))
+            else:
+                self._save_shards(state)
+            self._dirty = set()
+            # Las mutaciones pendientes y las del registro ya están en la instantánea
+            self._pending = []
+            atomic_write(self.journal_file, b"")
+
+    def _save_shards(self, state: Dict) -> None:
+        """Reescribe los fragmentos modificados y luego el manifiesto.
+
+        Los fragmentos nuevos usan un nombre con la generación actual, así
+        que el manifiesto anterior sigue siendo válido hasta que se reemplaza.
+        """
+        if len(self._shard_files) != self.shards:
+            self._shard_files = [None] * self.shards
+            self._dirty = set(range(self.shards))
+        self._generation += 1
+        groups: Dict[int, List[Credential]] = {index: [] for index in self._dirty}
+        # Mismo cálculo que _shard_of, en línea porque recorre todas las credenciales
+        shards = self.shards
+        for credential_id, credential in self._by_id.items():
+            group = groups.get((credential_id * 0x9E3779B1) % (1 << 32) % shards)
+            if group is not None:
+                group.append(credential)
+        base = os.path.basename(self.vault_file)
+
+        def write(index: int) -> None:
+            name = f"{base}.{self._generation}.{index}"
+            self._write_records(self._shard_path(name), state, groups[index])
+            self._shard_files[index] = name
+
+        self._map_shards(write, sorted(groups))
+        manifest = dict(state, shards=self.shards, generation=self._generation, files=self._shard_files)
+        self._write_records(self.vault_file, manifest, [], FORMAT_JSON)
+        self._remove_stale_shards()
+
+    def _remove_stale_shards(self) -> None:
+        """Elimina archivos de fragmentos que el manifiesto ya no referencia."""
+        directory = os.path.dirname(os.path.abspath(self.vault_file))
+        pattern = re.compile(re.escape(os.path.basename(self.vault_file)) + r"\.\d+\.\d+")
+        current = set(self._shard_files)
+        for name in os.listdir(directory):
+            if pattern.fullmatch(name) and name not in current:
+                os.remove(os.path.join(directory, name))
+
+    def _append(self, record: Dict) -> None:
+        """Encola una mutación encriptada para el registro."""
+        self.seq += 1
+        record["seq"] = self.seq
+        self._pending.append(self.crypto_manager.encrypt_data(json.dumps(record)) + b"\n")
+        self._writer.schedule()
+
+    def flush(self) -> None:
+        """Escribe en el registro las mutaciones pendientes con un único fsync."""
+        with self._lock:
+            if not self._pending:
+                return
+            durable_append(self.journal_file, b"".join(self._pending))
+            self._pending = []
+            if self._needs_compaction():
+                self.save_vault()
+
+    def has_data_for_key(self) -> bool:
+        """Indica si hay un vault guardado y la clave actual lo desencripta.
+
+        Se comprueba la instantánea o, si no existe, la primera mutación
+        del registro.
+        """
+        try:
+            if os.path.exists(self.vault_file):
+                with open(self.vault_file, "rb") as f:
+                    header = f.read(STREAM_HEADER.size)
+                    f.seek(0)
+                    if self.crypto_manager.is_stream(header):
+                        next(self._open_records(f))
+                    else:
+                        self.crypto_manager.decrypt_data(f.read())
+                return True
+            if os.path.exists(self.journal_file):
+                with open(self.journal_file, "rb") as f:
+                    for line in f:
+                        if line.strip():
+                            self.crypto_manager.decrypt_data(line.strip())
+                            return True
+            return False
+        except Exception:
+            return False
+
+    def reencrypt(self, new_crypto_manager: CryptoManager) -> None:
+        """Carga el vault con la clave actual y lo reescribe completo con otra.
+
+        La nueva instantánea reemplaza a la anterior de forma atómica y
+        después se vacía el registro; las mutaciones que queden en él con
+        la clave anterior ya están en la instantánea y se ignoran al cargar.
+        """
+        with self._lock:
+            self.load_vault()
+            self.crypto_manager = new_crypto_manager
+            self._dirty = set(range(self.shards))
+            self.save_vault()
+
+    def _needs_compaction(self) -> bool:
+        """Indica si el registro creció lo suficiente como para compactarlo."""
+        journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        paths = [self.vault_file] + [self._shard_path(name) for name in self._shard_files if name]
+        snapshot_size = sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+        return journal_size >= self.min_compaction_bytes and journal_size > self.compaction_ratio * snapshot_size
 
     def add_credentials(self, website: str, username: str, password: str) -> None:
         """Agrega nuevas credenciales al vault."""
-        credential = {
-            "id": len(self.credentials) + 1,
-            "website": website,
-            "username": username,
-            "password": password
-        }
-        self.credentials.append(credential)
-        self.save_vault()
-
-    def get_credentials(self, website: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            credential = Credential(self.next_id, website, username, password)
+            self._insert(credential)
+            self._mark_dirty(credential.id)
+            self._append({"op": "add", "credential": credential.to_dict()})
+
+    def get_credential(self, credential_id: int) -> Optional[Credential]:
+        """Obtiene una credencial por ID."""
+        return self._by_id.get(credential_id)
+
+    def get_credentials(self, website: Optional[str] = None) -> List[Credential]:
         """Obtiene todas las credenciales o filtra por sitio web."""
         if website:
-            return [c for c in self.credentials if website.lower() in c["website"].lower()]
+            website = website.lower()
+            with self._lock:
+                self._ensure_search_index()
+                candidates = self._website_index.candidates(website)
+                return [c for c in self._candidates(candidates) if website in c.website.lower()]
         return self.credentials
 
     def update_credentials(self, credential_id: int, website: str, username: str, password: str) -> bool:
         """Actualiza credenciales existentes."""
-        for cred in self.credentials:
-            if cred["id"] == credential_id:
-                cred.update({
-                    "website": website,
-                    "username": username,
-                    "password": password
-                })
-                self.save_vault()
-                return True
-        return False
+        with self._lock:
+            cred = self._by_id.get(credential_id)
+            if cred is None:
+                return False
+            self._index_remove(cred)
+            cred.website = website
+            cred.username = username
+            cred.password = password
+            self._index_add(cred)
+            self._mark_dirty(credential_id)
+            self._append({"op": "update", "credential": cred.to_dict()})
+            return True
 
     def delete_credentials(self, credential_id: int) -> bool:
         """Elimina credenciales por ID."""
-        for i, cred in enumerate(self.credentials):
-            if cred["id"] == credential_id:
-                self.credentials.pop(i)
-                self.save_vault()
-                return True
-        return False
+        with self._lock:
+            cred = self._by_id.pop(credential_id, None)
+            if cred is None:
+                return False
+            self._index_remove(cred)
+            self._mark_dirty(credential_id)
+            self._append({"op": "delete", "id": credential_id})
+            return True
 
-    def search_credentials(self, query: str) -> List[Dict]:
+    def search_credentials(self, query: str) -> List[Credential]:
         """Busca credenciales por sitio web o nombre de usuario."""
         query = query.lower()
-        return [
-            cred for cred in self.credentials
-            if query in cred["website"].lower() or query in cred["username"].lower()
-        ] 
\ No newline at end of file
+        with self._lock:
+            self._ensure_search_index()
+            candidates = self._website_index.candidates(query)
+            if candidates is not None:
+                candidates |= self._username_index.candidates(query)
+            return [
+                cred for cred in self._candidates(candidates)
+                if query in cred.website.lower() or query in cred.username.lower()
+            ]
+
+    def _ensure_search_index(self) -> None:
+        """Construye los índices de búsqueda si todavía no existen."""
+        if self._website_index is None:
+            self._website_index = TrigramIndex()
+            self._username_index = TrigramIndex()
+            for credential in self._by_id.values():
+                self._index_add(credential)
+
+    def _drop_search_index(self) -> None:
+        self._website_index = None
+        self._username_index = None
+
+    def _index_add(self, credential: Credential) -> None:
+        if self._website_index is not None:
+            self._website_index.add(credential.id, credential.website)
+            self._username_index.add(credential.id, credential.username)
+
+    def _index_remove(self, credential: Credential) -> None:
+        if self._website_index is not None:
+            self._website_index.remove(credential.id, credential.website)
+            self._username_index.remove(credential.id, credential.username)
+
+    def _candidates(self, ids: Optional[set]) -> Iterable[Credential]:
+        """Credenciales candidatas en orden de id; todas si el índice no aplica.
+
+        Si los candidatos son la mitad o más del vault, recorrerlo entero es
+        más barato que ordenar los ids.
+        """
+        if ids is None or 2 * len(ids) >= len(self._by_id):
+            return self._by_id.values()
+        return [self._by_id[credential_id] for credential_id in sorted(ids)]
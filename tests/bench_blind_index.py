@@ -0,0 +1,76 @@
+"""Latencia de búsqueda con metadatos encriptados (índice ciego) frente a LIKE en claro.
+
+Se llena una base de datos, se mide list_credentials con el recorrido LIKE
+sobre los metadatos en claro (fts_enabled=False) y luego se convierte con
+enable_encrypted_metadata() y se repiten las mismas consultas contra el
+índice ciego: host, usuario exacto y prefijo de palabra.
+
+Uso: python tests/bench_blind_index.py --rows 50000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+
+def _queries(rows: int) -> dict:
+    target = rows // 2
+    return {
+        "host": f"sitio{target}.example.com",
+        "usuario": f"usuario{target}@correo.com",
+        "prefijo": f"sitio{target}",
+    }
+
+
+def _latency(db_manager: DatabaseManager, query: str, repeat: int) -> float:
+    """Milisegundos por búsqueda."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db_manager.list_credentials(query)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(rows: int, repeat: int) -> dict:
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    queries = _queries(rows)
+    with tempfile.TemporaryDirectory() as directory:
+        with DatabaseManager(crypto_manager, os.path.join(directory, "vault.db")) as db_manager:
+            db_manager.add_credentials_bulk(
+                {
+                    'website': f"https://www.sitio{i}.example.com/login",
+                    'username': f"usuario{i}@correo.com",
+                    'password': "clave"
+                }
+                for i in range(rows)
+            )
+            db_manager.fts_enabled = False
+            plaintext = {name: _latency(db_manager, query, repeat) for name, query in queries.items()}
+            start = time.perf_counter()
+            db_manager.enable_encrypted_metadata()
+            conversion = time.perf_counter() - start
+            blind = {name: _latency(db_manager, query, repeat) for name, query in queries.items()}
+    return {"plaintext": plaintext, "blind": blind, "conversion": conversion}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat)
+    print(f"{args.rows} credenciales; conversión a metadatos encriptados: {results['conversion']:.1f}s")
+    print(f"{'consulta':>9}  {'like ms':>8}  {'ciego ms':>8}")
+    for name in results["plaintext"]:
+        print(f"{name:>9}  {results['plaintext'][name]:>8.2f}  {results['blind'][name]:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Filas por segundo de las operaciones en lote de DatabaseManager.
+
+Mide add_credentials_bulk, update_credentials_bulk y delete_credentials_bulk
+para cada tamaño, y add_credential fila a fila como referencia (sobre un
+máximo de --single filas, porque cada una hace su propio commit).
+
+Uso: python tests/bench_bulk.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+
+def _rate(count: int, func) -> float:
+    start = time.perf_counter()
+    func()
+    return count / (time.perf_counter() - start)
+
+
+def run(size: int, single: int) -> dict:
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    rows = [
+        {'website': f"sitio{i}.com", 'username': f"usuario{i}", 'password': f"clave{i}"}
+        for i in range(size)
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        with DatabaseManager(crypto_manager, os.path.join(directory, "vault.db")) as db_manager:
+            results = {"add_bulk": _rate(size, lambda: db_manager.add_credentials_bulk(rows))}
+            updates = [dict(row, id=i + 1, password=f"nueva{i}") for i, row in enumerate(rows)]
+            results["update_bulk"] = _rate(size, lambda: db_manager.update_credentials_bulk(updates))
+            results["delete_bulk"] = _rate(size, lambda: db_manager.delete_credentials_bulk(range(1, size + 1)))
+            count = min(size, single)
+            results["add fila a fila"] = _rate(
+                count, lambda: [db_manager.add_credential(**row) for row in rows[:count]]
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--single", type=int, default=1000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        results = run(size, args.single)
+        print(f"{size} filas: " + "  ".join(f"{name} {rate:.0f}/s" for name, rate in results.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Tiempo y tamaño de los formatos de contenido del vault: JSON por líneas frente al binario por columnas.
+
+Primero se mide solo el códec (codificar y decodificar en memoria) y luego
+un guardado y una carga completos del vault encriptado con cada formato.
+Las contraseñas tienen 16 caracteres e incluyen caracteres no ASCII y que
+JSON debe escapar.
+
+Uso: python tests/bench_codec.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from models import Credential  # noqa: E402
+from record_codec import DECODERS, ENCODERS, FORMAT_NAMES  # noqa: E402
+from vault import PasswordVault  # noqa: E402
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!\"\\/ñé€"
+
+
+def _records(count: int):
+    rng = random.Random(0)
+    return [
+        Credential(i + 1, f"sitio{i}.example.com", f"usuario{i}@correo.com", "".join(rng.choices(ALPHABET, k=16)))
+        for i in range(count)
+    ]
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run_codec(records, payload_format: str) -> tuple:
+    """Milisegundos de codificación y decodificación y tamaño en bytes."""
+    tag = FORMAT_NAMES[payload_format]
+    state = {"seq": 0, "next_id": len(records) + 1}
+    payload, encode_ms = _timed(lambda: b"".join(ENCODERS[tag](state, records)))
+    decoded, decode_ms = _timed(lambda: list(DECODERS[tag]([payload])))
+    assert len(decoded) == len(records) + 1
+    return encode_ms, decode_ms, len(payload)
+
+
+def run_vault(records, payload_format: str) -> tuple:
+    """Segundos de guardado y carga del vault encriptado y tamaño del archivo."""
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    with tempfile.TemporaryDirectory() as directory:
+        vault_file = os.path.join(directory, "vault.enc")
+        vault = PasswordVault(crypto_manager, vault_file, write_window=0, payload_format=payload_format)
+        vault.credentials = records
+        _, save_ms = _timed(vault.save_vault)
+        loaded = PasswordVault(crypto_manager, vault_file, write_window=0)
+        _, load_ms = _timed(loaded.load_vault)
+        return save_ms / 1000, load_ms / 1000, os.path.getsize(vault_file)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'registros':>9}  {'formato':>7}  {'cod ms':>8}  {'dec ms':>8}  {'KiB':>8}  {'guardar s':>9}  {'cargar s':>8}")
+    for size in args.sizes:
+        records = _records(size)
+        for payload_format in ("json", "binary"):
+            encode_ms, decode_ms, payload_size = run_codec(records, payload_format)
+            save_s, load_s, _ = run_vault(records, payload_format)
+            print(
+                f"{size:>9}  {payload_format:>7}  {encode_ms:>8.1f}  {decode_ms:>8.1f}  "
+                f"{payload_size / 1024:>8.0f}  {save_s:>9.2f}  {load_s:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Latencia por operación de DatabaseManager: conexión nueva por operación frente a conexión persistente.
+
+"connect" reproduce el comportamiento anterior (sqlite3.connect y close en
+cada operación, con el mismo SQL); "pooled" usa los métodos de
+DatabaseManager sobre su conexión por hilo en modo WAL. Solo "pooled"
+encripta o desencripta la contraseña, así que la comparación favorece a
+"connect".
+
+Uso: python tests/bench_db_connections.py --rows 10000 --ops 500
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+
+def _per_op(func, ops: int) -> float:
+    """Microsegundos por llamada a func(i)."""
+    start = time.perf_counter()
+    for i in range(ops):
+        func(i)
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def run(rows: int, ops: int) -> dict:
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "vault.db")
+        with DatabaseManager(crypto_manager, path) as db_manager:
+            db_manager.add_credentials_bulk(
+                {'website': f"sitio{i}.com", 'username': f"usuario{i}", 'password': f"clave{i}"}
+                for i in range(rows)
+            )
+            encrypted = crypto_manager.encrypt_data("clave")
+
+            def connect_read(i):
+                conn = sqlite3.connect(path)
+                try:
+                    conn.execute('SELECT encrypted_password FROM credentials WHERE id = ?', (i + 1,)).fetchone()
+                finally:
+                    conn.close()
+
+            def connect_update(i):
+                conn = sqlite3.connect(path)
+                try:
+                    with conn:
+                        conn.execute(
+                            'UPDATE credentials SET website = ?, username = ?, encrypted_password = ? WHERE id = ?',
+                            (f"sitio{i}.com", f"usuario{i}", encrypted, i + 1)
+                        )
+                finally:
+                    conn.close()
+
+            def connect_insert(i):
+                conn = sqlite3.connect(path)
+                try:
+                    with conn:
+                        conn.execute(
+                            'INSERT INTO credentials (website, username, encrypted_password) VALUES (?, ?, ?)',
+                            (f"nuevo{i}.com", "usuario", encrypted)
+                        )
+                finally:
+                    conn.close()
+
+            results = {
+                "lectura por id": (
+                    _per_op(connect_read, ops),
+                    _per_op(lambda i: db_manager.reveal_password(i + 1), ops),
+                ),
+                "actualización": (
+                    _per_op(connect_update, ops),
+                    _per_op(lambda i: db_manager.update_credential(i + 1, f"sitio{i}.com", f"usuario{i}", "clave"), ops),
+                ),
+                "alta": (
+                    _per_op(connect_insert, ops),
+                    _per_op(lambda i: db_manager.add_credential(f"otro{i}.com", "usuario", "clave"), ops),
+                ),
+            }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--ops", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{args.rows} credenciales, {args.ops} operaciones de cada tipo (us por operación)")
+    print(f"{'operación':>16}  {'connect':>9}  {'pooled':>9}")
+    for name, (connect, pooled) in run(args.rows, args.ops).items():
+        print(f"{name:>16}  {connect:>9.0f}  {pooled:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Latencia de búsqueda de DatabaseManager según el tamaño de la tabla: FTS5 trigram frente a LIKE.
+
+Para cada tamaño se ejecuta la misma consulta con el índice FTS5 y con el
+recorrido LIKE '%q%' (fts_enabled=False), con un límite de resultados.
+
+Uso: python tests/bench_search.py --sizes 1000 10000 100000 --limit 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+QUERIES = ("sitio12345", "example", "usuario9@")
+
+
+def _latency(db_manager: DatabaseManager, query: str, limit: int, repeat: int) -> float:
+    """Milisegundos por búsqueda."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        db_manager.list_credentials(query, limit)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def run(size: int, limit: int, repeat: int) -> dict:
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        with DatabaseManager(crypto_manager, os.path.join(directory, "vault.db")) as db_manager:
+            if not db_manager.fts_enabled:
+                raise SystemExit("Esta versión de SQLite no tiene FTS5")
+            db_manager.add_credentials_bulk(
+                {'website': f"sitio{i}.example.com", 'username': f"usuario{i}@correo.com", 'password': "clave"}
+                for i in range(size)
+            )
+            for query in QUERIES:
+                fts = _latency(db_manager, query, limit, repeat)
+                db_manager.fts_enabled = False
+                like = _latency(db_manager, query, limit, repeat)
+                db_manager.fts_enabled = True
+                results[query] = (fts, like)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'filas':>7}  {'consulta':>12}  {'fts5 ms':>8}  {'like ms':>8}")
+    for size in args.sizes:
+        for query, (fts, like) in run(size, args.limit, args.repeat).items():
+            print(f"{size:>7}  {query:>12}  {fts:>8.2f}  {like:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Latencia de search_credentials con el índice de trigramas frente a un recorrido lineal.
+
+El recorrido lineal es la búsqueda anterior al índice: comparar la consulta
+en minúsculas con el sitio web y el usuario de cada credencial. Las
+consultas van de muy selectivas a muy amplias; las de menos de tres
+caracteres no tienen trigramas y recorren todas las credenciales.
+
+Uso: python tests/bench_trigram.py --records 100000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from models import Credential  # noqa: E402
+from vault import PasswordVault  # noqa: E402
+
+QUERIES = ["sitio12345.", "usuario4242@", "sitio9", "correo", "ab"]
+
+
+def _scan(credentials, query: str):
+    query = query.lower()
+    return [cred for cred in credentials if query in cred.website.lower() or query in cred.username.lower()]
+
+
+def _median_ms(func, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def run(records: int, repeats: int) -> dict:
+    """Mediana en milisegundos por consulta, con el índice y con el recorrido."""
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    vault = PasswordVault(crypto_manager, os.devnull, write_window=0)
+    vault.credentials = [
+        Credential(i + 1, f"sitio{i}.example.com", f"usuario{i}@correo.com", "secreto")
+        for i in range(records)
+    ]
+    credentials = vault.credentials
+
+    start = time.perf_counter()
+    vault.search_credentials("construir")
+    build_s = time.perf_counter() - start
+
+    results = {}
+    for query in QUERIES:
+        matches = len(vault.search_credentials(query))
+        assert matches == len(_scan(credentials, query))
+        results[query] = (
+            matches,
+            _median_ms(lambda: vault.search_credentials(query), repeats),
+            _median_ms(lambda: _scan(credentials, query), repeats),
+        )
+    return {"build_s": build_s, "queries": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    result = run(args.records, args.repeats)
+    print(f"{args.records} credenciales; índice construido en {result['build_s']:.2f} s")
+    print(f"{'consulta':>14}  {'resultados':>10}  {'índice ms':>9}  {'recorrido ms':>12}")
+    for query, (matches, index_ms, scan_ms) in result["queries"].items():
+        print(f"{query!r:>14}  {matches:>10}  {index_ms:>9.2f}  {scan_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
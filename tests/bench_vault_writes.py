@@ -0,0 +1,69 @@
+"""Compara el rendimiento de escritura del vault según cómo se persisten las mutaciones.
+
+Modos:
+- rewrite: reescribe la instantánea completa tras cada mutación (comportamiento anterior)
+- sync:    una línea en el registro y un fsync por mutación (write_window=0)
+- window:  las mutaciones de cada ventana se agrupan en un único fsync
+
+Uso: python tests/bench_vault_writes.py --count 500 --window 0.25
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import vault as vault_module  # noqa: E402
+from crypto_utils import CryptoManager  # noqa: E402
+from vault import PasswordVault  # noqa: E402
+
+
+def run(mode: str, count: int, window: float) -> dict:
+    """Agrega count credenciales y devuelve mutaciones por segundo y número de fsync."""
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    fsyncs = 0
+    original_append = vault_module.durable_append
+
+    def counted_append(path, data):
+        nonlocal fsyncs
+        fsyncs += 1
+        original_append(path, data)
+
+    vault_module.durable_append = counted_append
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            vault = PasswordVault(
+                crypto_manager,
+                os.path.join(directory, "vault.enc"),
+                write_window=window if mode == "window" else 0
+            )
+            vault.load_vault()
+            start = time.perf_counter()
+            for i in range(count):
+                vault.add_credentials(f"sitio{i}.com", f"usuario{i}", f"clave{i}")
+                if mode == "rewrite":
+                    vault.save_vault()
+            vault.flush()
+            elapsed = time.perf_counter() - start
+    finally:
+        vault_module.durable_append = original_append
+    return {"rate": count / elapsed, "fsyncs": fsyncs, "seconds": elapsed}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--window", type=float, default=0.25)
+    args = parser.parse_args()
+
+    print(f"{args.count} altas")
+    for mode in ("rewrite", "sync", "window"):
+        result = run(mode, args.count, args.window)
+        print(f"{mode:>8}: {result['rate']:>9.0f} mutaciones/s  {result['fsyncs']:>5} fsync de registro  {result['seconds']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos de src se importan por nombre, igual que en main.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from crypto_utils import CryptoManager  # noqa: E402
+from database import DatabaseManager  # noqa: E402
+
+
+@pytest.fixture
+def crypto_manager():
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption("contraseña de pruebas")
+    return crypto_manager
+
+
+@pytest.fixture
+def db_manager(crypto_manager, tmp_path):
+    db_manager = DatabaseManager(crypto_manager, str(tmp_path / "vault.db"))
+    yield db_manager
+    db_manager.close()
@@ -0,0 +1,120 @@
+import hashlib
+import json
+
+import pytest
+
+from auth import AuthManager
+from crypto_utils import CryptoManager
+from database import DatabaseManager
+from vault import PasswordVault
+
+OLD_PASSWORD = "Contraseña!Antigua1"
+NEW_PASSWORD = "Contraseña!Nueva22"
+
+
+def _auth_manager(tmp_path):
+    auth_manager = AuthManager(CryptoManager(), kdf_target_seconds=0.01)
+    auth_manager.auth_file = str(tmp_path / "auth.json")
+    auth_manager.db_file = str(tmp_path / "vault.db")
+    auth_manager.vault_file = str(tmp_path / "vault.enc")
+    return auth_manager
+
+
+def _legacy_crypto():
+    crypto_manager = CryptoManager()
+    crypto_manager.set_key(hashlib.sha256(OLD_PASSWORD.encode()).digest())
+    return crypto_manager
+
+
+@pytest.fixture
+def legacy_account(tmp_path):
+    """Cuenta con el formato original: hash SHA-256 y datos encriptados con sha256(contraseña)."""
+    crypto_manager = _legacy_crypto()
+    with open(tmp_path / "auth.json", "w") as f:
+        json.dump({
+            "master_password_hash": crypto_manager.hash_password(OLD_PASSWORD),
+            "locked": False,
+            "login_attempts": 0
+        }, f)
+    db_manager = DatabaseManager(crypto_manager, str(tmp_path / "vault.db"))
+    db_manager.add_credential("a.com", "ana", "clave-a")
+    db_manager.add_credential("b.com", "bob", "clave-b")
+    db_manager.enable_encrypted_metadata()
+    db_manager.close()
+    vault = PasswordVault(crypto_manager, str(tmp_path / "vault.enc"), write_window=0)
+    vault.load_vault()
+    vault.add_credentials("c.com", "carla", "clave-c")
+    vault.save_vault()
+    vault.add_credentials("d.com", "dani", "clave-d")
+    return tmp_path
+
+
+def _sqlite_passwords(crypto_manager, tmp_path):
+    db_manager = DatabaseManager(crypto_manager, str(tmp_path / "vault.db"))
+    try:
+        return sorted((c.website, c.password) for c in db_manager.iter_credentials(with_passwords=True))
+    finally:
+        db_manager.close()
+
+
+def _vault_passwords(crypto_manager, tmp_path):
+    vault = PasswordVault(crypto_manager, str(tmp_path / "vault.enc"), write_window=0)
+    vault.load_vault()
+    return sorted((c.website, c.password) for c in vault.credentials)
+
+
+def test_legacy_login_moves_data_to_a_random_key(legacy_account):
+    auth_manager = _auth_manager(legacy_account)
+    assert auth_manager.login(OLD_PASSWORD)
+
+    user_data = json.load(open(legacy_account / "auth.json"))
+    assert "wrapped_key" in user_data
+    assert "master_password_hash" not in user_data
+    assert "previous_kdf" not in user_data
+
+    crypto_manager = auth_manager.crypto_manager
+    assert _sqlite_passwords(crypto_manager, legacy_account) == [("a.com", "clave-a"), ("b.com", "clave-b")]
+    assert _vault_passwords(crypto_manager, legacy_account) == [("c.com", "clave-c"), ("d.com", "clave-d")]
+    # La clave SHA-256 sin sal ya no desencripta nada
+    assert _sqlite_passwords(_legacy_crypto(), legacy_account) == []
+    assert not PasswordVault(_legacy_crypto(), str(legacy_account / "vault.enc")).has_data_for_key()
+
+    # Las búsquedas por índice ciego usan la clave nueva
+    db_manager = DatabaseManager(crypto_manager, str(legacy_account / "vault.db"))
+    try:
+        assert [c.website for c in db_manager.list_credentials("bob")] == ["b.com"]
+    finally:
+        db_manager.close()
+
+
+def test_interrupted_upgrade_finishes_on_next_login(legacy_account, monkeypatch):
+    def fail(self, new_crypto_manager, batch_size=500):
+        raise ValueError("corte simulado")
+
+    auth_manager = _auth_manager(legacy_account)
+    with monkeypatch.context() as patch:
+        patch.setattr(DatabaseManager, "reencrypt", fail)
+        with pytest.raises(ValueError):
+            auth_manager.login(OLD_PASSWORD)
+    assert "previous_kdf" in json.load(open(legacy_account / "auth.json"))
+    assert _sqlite_passwords(_legacy_crypto(), legacy_account) == [("a.com", "clave-a"), ("b.com", "clave-b")]
+
+    auth_manager = _auth_manager(legacy_account)
+    assert auth_manager.login(OLD_PASSWORD)
+    assert "previous_kdf" not in json.load(open(legacy_account / "auth.json"))
+    assert _sqlite_passwords(auth_manager.crypto_manager, legacy_account) == [
+        ("a.com", "clave-a"), ("b.com", "clave-b")
+    ]
+
+
+def test_change_master_password_keeps_data_and_rejects_old_password(legacy_account):
+    auth_manager = _auth_manager(legacy_account)
+    assert auth_manager.login(OLD_PASSWORD)
+    assert auth_manager.change_master_password(OLD_PASSWORD, NEW_PASSWORD)
+
+    auth_manager = _auth_manager(legacy_account)
+    assert not auth_manager.login(OLD_PASSWORD)
+    assert auth_manager.login(NEW_PASSWORD)
+    assert _sqlite_passwords(auth_manager.crypto_manager, legacy_account) == [
+        ("a.com", "clave-a"), ("b.com", "clave-b")
+    ]
@@ -0,0 +1,28 @@
+def test_add_bulk_reports_bad_rows_by_index(db_manager):
+    result = db_manager.add_credentials_bulk([
+        {'website': 'a.com', 'username': 'ana', 'password': 'clave'},
+        {'website': 'b.com', 'username': 'bob', 'password': 123},
+        "no es una fila",
+        {'website': 'c.com'},
+    ])
+    assert result['written'] == 1
+    assert [f['index'] for f in result['failed']] == [1, 2, 3]
+
+
+def test_update_bulk_reports_bad_rows_by_index(db_manager):
+    db_manager.add_credentials_bulk([
+        {'website': 'a.com', 'username': 'ana', 'password': 'clave'},
+        {'website': 'b.com', 'username': 'bob', 'password': 'clave'},
+    ])
+    result = db_manager.update_credentials_bulk([
+        {'id': 1, 'website': 'a.com', 'username': 'ana', 'password': 'nueva'},
+        {'id': 2, 'website': 'b.com', 'username': 'bob', 'password': 'nueva'},
+        "no es una fila",
+        {'website': 'c.com', 'username': 'sin id', 'password': 'x'},
+        {'id': 99, 'website': 'd.com', 'username': 'otro', 'password': 'x'},
+        {'id': 1, 'website': 'a.com', 'username': 'ana', 'password': 5},
+    ])
+    assert result['written'] == 2
+    assert [f['index'] for f in result['failed']] == [2, 3, 4, 5]
+    assert db_manager.reveal_password(1) == 'nueva'
+    assert db_manager.reveal_password(2) == 'nueva'
@@ -0,0 +1,113 @@
+from database import DatabaseManager
+
+
+def _add_many(db_manager, count, prefix="sitio"):
+    result = db_manager.add_credentials_bulk(
+        {'website': f"{prefix}{i}.com", 'username': f"usuario{i}", 'password': f"clave{i}"}
+        for i in range(count)
+    )
+    assert result['failed'] == []
+
+
+def _vm_steps(db_manager, watermark):
+    """Instrucciones de la VM de SQLite que ejecuta get_changes_since(watermark)."""
+    steps = 0
+
+    def count():
+        nonlocal steps
+        steps += 1
+        return 0
+
+    conn = db_manager.get_connection()
+    conn.set_progress_handler(count, 1)
+    try:
+        changes = db_manager.get_changes_since(watermark)
+    finally:
+        conn.set_progress_handler(None, 1)
+    return changes, steps
+
+
+def test_inserts_are_reported_after_the_watermark(db_manager):
+    _add_many(db_manager, 3)
+    first = db_manager.get_changes_since(0)
+    assert [c.website for c in first['changed']] == ["sitio0.com", "sitio1.com", "sitio2.com"]
+    assert first['deleted'] == []
+    assert not first['full_resync']
+
+    db_manager.add_credential("nuevo.com", "ana", "secreto")
+    second = db_manager.get_changes_since(first['watermark'])
+    assert [c.website for c in second['changed']] == ["nuevo.com"]
+    assert second['watermark'] > first['watermark']
+    assert second['changed'][0].password is None
+
+
+def test_updates_move_the_row_past_the_watermark(db_manager):
+    _add_many(db_manager, 3)
+    watermark = db_manager.get_changes_since(0)['watermark']
+    credential_id = db_manager.list_credentials("sitio1")[0].id
+
+    db_manager.update_credential(credential_id, "sitio1.com", "usuario1", "otra clave")
+    changes = db_manager.get_changes_since(watermark)
+    assert [c.id for c in changes['changed']] == [credential_id]
+    assert changes['changed'][0].change_seq == changes['watermark']
+
+
+def test_deletions_leave_tombstones(db_manager):
+    _add_many(db_manager, 3)
+    watermark = db_manager.get_changes_since(0)['watermark']
+    credential_id = db_manager.list_credentials("sitio2")[0].id
+
+    db_manager.delete_credential(credential_id)
+    changes = db_manager.get_changes_since(watermark)
+    assert changes['changed'] == []
+    assert changes['deleted'] == [credential_id]
+    assert db_manager.get_changes_since(changes['watermark'])['deleted'] == []
+
+
+def test_pruned_tombstones_require_full_resync(db_manager):
+    _add_many(db_manager, 3)
+    stale = db_manager.get_changes_since(0)['watermark']
+    db_manager.delete_credential(db_manager.list_credentials("sitio0")[0].id)
+    current = db_manager.get_changes_since(stale)['watermark']
+
+    assert db_manager.prune_deletions(current) == 1
+    assert db_manager.get_changes_since(stale)['full_resync']
+    assert db_manager.get_changes_since(stale)['deleted'] == []
+    assert not db_manager.get_changes_since(current)['full_resync']
+
+
+def test_changes_survive_reopening(db_manager, crypto_manager):
+    _add_many(db_manager, 2)
+    watermark = db_manager.get_changes_since(0)['watermark']
+    db_manager.close()
+
+    reopened = DatabaseManager(crypto_manager, db_manager.db_path)
+    try:
+        reopened.add_credential("tras.com", "reabrir", "clave")
+        changes = reopened.get_changes_since(watermark)
+        assert [c.website for c in changes['changed']] == ["tras.com"]
+    finally:
+        reopened.close()
+
+
+def test_delta_cost_follows_changes_not_vault_size(crypto_manager, tmp_path):
+    """El mismo delta cuesta lo mismo con 200 o con 5000 credenciales."""
+    costs = {}
+    for size in (200, 5000):
+        db_manager = DatabaseManager(crypto_manager, str(tmp_path / f"vault-{size}.db"))
+        try:
+            _add_many(db_manager, size)
+            watermark = db_manager.get_changes_since(0)['watermark']
+            db_manager.add_credential("delta.com", "nuevo", "clave")
+            db_manager.update_credential(1, "sitio0.com", "usuario0", "cambiada")
+            db_manager.delete_credential(2)
+
+            changes, steps = _vm_steps(db_manager, watermark)
+            assert [c.website for c in changes['changed']] == ["delta.com", "sitio0.com"]
+            assert changes['deleted'] == [2]
+            costs[size] = steps
+        finally:
+            db_manager.close()
+
+    # Con un recorrido completo, 25 veces más filas costarían unas 25 veces más
+    assert costs[5000] <= costs[200] * 1.5
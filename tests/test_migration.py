@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from storage import SQLiteStorage, migrate_vault_to_sqlite
+from vault import PasswordVault
+
+
+def _contents(credentials):
+    return sorted((c.website, c.username, c.password) for c in credentials)
+
+
+def _populate(vault, count):
+    for i in range(count):
+        vault.add_credentials(f"sitio{i}.com", f"usuario{i}", f"clave{i}")
+
+
+@pytest.mark.parametrize("shards", [1, 4])
+def test_iter_records_matches_load_vault(crypto_manager, tmp_path, shards):
+    vault_file = str(tmp_path / "vault.enc")
+    vault = PasswordVault(crypto_manager, vault_file, write_window=0, shards=shards, reshard_threshold=None)
+    vault.load_vault()
+    _populate(vault, 50)
+    vault.save_vault()
+    # Mutaciones que quedan solo en el registro
+    vault.update_credentials(3, "cambiado.com", "usuario3", "otra")
+    vault.delete_credentials(4)
+    vault.add_credentials("nuevo.com", "ana", "secreto")
+    vault.update_credentials(51, "nuevo.com", "ana", "secreto2")
+    vault.add_credentials("efimero.com", "bob", "x")
+    vault.delete_credentials(52)
+
+    streamed = PasswordVault(crypto_manager, vault_file, write_window=0)
+    loaded = PasswordVault(crypto_manager, vault_file, write_window=0)
+    loaded.load_vault()
+    assert _contents(streamed.iter_records()) == _contents(loaded.credentials)
+    assert ("cambiado.com", "usuario3", "otra") in _contents(streamed.iter_records())
+    assert len(loaded.credentials) == 50
+
+
+def test_iter_records_reads_legacy_snapshots(crypto_manager, tmp_path):
+    vault_file = tmp_path / "vault.enc"
+    credentials = [{"id": 1, "website": "a.com", "username": "u", "password": "p"}]
+    vault_file.write_bytes(crypto_manager.encrypt_data(json.dumps(credentials)))
+    vault = PasswordVault(crypto_manager, str(vault_file), write_window=0)
+    assert _contents(vault.iter_records()) == [("a.com", "u", "p")]
+
+
+def _saved_vault(crypto_manager, vault_file, count):
+    vault = PasswordVault(crypto_manager, vault_file, write_window=0)
+    vault.load_vault()
+    _populate(vault, count)
+    vault.save_vault()
+    return vault
+
+
+def test_migration_imports_into_empty_sqlite_and_renames_files(crypto_manager, tmp_path):
+    vault_file = str(tmp_path / "vault.enc")
+    vault = _saved_vault(crypto_manager, vault_file, 12)
+    vault.add_credentials("registro.com", "solo", "journal")
+
+    storage = SQLiteStorage(crypto_manager, str(tmp_path / "vault.db"))
+    try:
+        assert migrate_vault_to_sqlite(storage, crypto_manager, vault_file, batch_size=5) == 13
+        assert _contents(storage.iter_credentials(with_passwords=True)) == _contents(vault.credentials)
+        assert not os.path.exists(vault_file)
+        assert os.path.exists(vault_file + ".migrated")
+        assert os.path.exists(vault_file + ".journal.migrated")
+        assert storage.db_manager.get_setting('vault_migration') is None
+        # Una segunda ejecución no encuentra nada que migrar
+        assert migrate_vault_to_sqlite(storage, crypto_manager, vault_file) == 0
+    finally:
+        storage.close()
+
+
+def test_migration_does_not_resurrect_sqlite_changes(crypto_manager, tmp_path):
+    """Con escritura doble, las bajas y modificaciones solo llegaban a SQLite."""
+    vault_file = str(tmp_path / "vault.enc")
+    vault = PasswordVault(crypto_manager, vault_file, write_window=0)
+    vault.load_vault()
+    storage = SQLiteStorage(crypto_manager, str(tmp_path / "vault.db"))
+    try:
+        for website, password in (("a.com", "p1"), ("b.com", "p2"), ("c.com", "p3")):
+            vault.add_credentials(website, "ana", password)
+            storage.add_credential(website, "ana", password)
+        by_website = {c.website: c.id for c in storage.list_credentials()}
+        storage.delete_credential(by_website["a.com"])
+        storage.update_credential(by_website["b.com"], "b.com", "ana", "NEW")
+
+        assert migrate_vault_to_sqlite(storage, crypto_manager, vault_file) == 0
+        assert _contents(storage.iter_credentials(with_passwords=True)) == [
+            ("b.com", "ana", "NEW"), ("c.com", "ana", "p3")
+        ]
+        assert os.path.exists(vault_file + ".journal.migrated")
+    finally:
+        storage.close()
+
+
+def test_interrupted_migration_resumes(crypto_manager, tmp_path):
+    vault_file = str(tmp_path / "vault.enc")
+    vault = _saved_vault(crypto_manager, vault_file, 10)
+    storage = SQLiteStorage(crypto_manager, str(tmp_path / "vault.db"))
+    try:
+        # Primer lote ya importado cuando se cortó la migración
+        storage.db_manager.set_setting('vault_migration', 'importing')
+        storage.add_credentials_bulk(vault.credentials[:4])
+
+        assert migrate_vault_to_sqlite(storage, crypto_manager, vault_file, batch_size=3) == 6
+        assert _contents(storage.iter_credentials(with_passwords=True)) == _contents(vault.credentials)
+        assert storage.db_manager.get_setting('vault_migration') is None
+    finally:
+        storage.close()
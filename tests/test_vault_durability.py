@@ -0,0 +1,104 @@
+import os
+import random
+import signal
+import subprocess
+import sys
+
+import pytest
+
+import vault_crash_writer as writer
+
+pytestmark = pytest.mark.skipif(os.name != "posix", reason="usa SIGKILL")
+
+WRITER = writer.__file__
+
+
+def _run_writer(vault_file, *args):
+    proc = subprocess.run(
+        [sys.executable, WRITER, vault_file, *args],
+        capture_output=True, text=True, timeout=120
+    )
+    return proc.returncode, _acked(proc.stdout)
+
+
+def _acked(output):
+    acks = [int(line.split()[1]) for line in output.splitlines() if line.startswith("ack ")]
+    return acks[-1] if acks else 0
+
+
+def _load(vault_file, shards):
+    vault = writer.open_vault(vault_file, shards)
+    vault.load_vault()
+    return vault
+
+
+def _contents(vault):
+    return {c.id: (c.website, c.username, c.password) for c in vault.credentials}
+
+
+def _assert_recovered(vault_file, shards, acked, total_ops):
+    """Tras el corte están todas las mutaciones confirmadas y como mucho la que estaba en curso."""
+    ops = writer.build_ops(total_ops)
+    vault = _load(vault_file, shards)
+    assert _contents(vault) in (
+        writer.expected_state(ops[:acked]),
+        writer.expected_state(ops[:acked + 1]),
+    )
+
+    # El vault recuperado sigue aceptando escrituras y vuelve a cargarse igual
+    vault.add_credentials("despues.com", "recuperado", "clave")
+    expected = _contents(vault)
+    assert _contents(_load(vault_file, shards)) == expected
+
+
+CRASH_POINTS = [
+    ("durable_append", 1),
+    ("durable_append", 9),
+    ("durable_append", 57),
+    ("durable_append", 150),
+    ("atomic_write_stream", 1),
+    ("atomic_write_stream", 2),
+    ("atomic_write_stream", 7),
+    ("atomic_write_stream", 20),
+    ("atomic_write", 1),
+    ("atomic_write", 4),
+    ("atomic_write", 25),
+]
+
+
+@pytest.mark.parametrize("shards", [1, 4])
+@pytest.mark.parametrize("target,call_number", CRASH_POINTS)
+def test_injected_crash_recovers(tmp_path, shards, target, call_number):
+    vault_file = str(tmp_path / "vault.enc")
+    returncode, acked = _run_writer(
+        vault_file, "--ops", "200", "--shards", str(shards),
+        "--crash-in", target, "--crash-at", str(call_number)
+    )
+    assert returncode == -signal.SIGKILL
+    _assert_recovered(vault_file, shards, acked, 200)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_killed_writer_recovers(tmp_path, seed):
+    """SIGKILL desde fuera, en un momento aleatorio tras algunas mutaciones."""
+    total_ops = 100000
+    shards = 1 + seed % 2 * 3
+    kill_after = random.Random(seed).randint(5, 150)
+    vault_file = str(tmp_path / "vault.enc")
+    proc = subprocess.Popen(
+        [sys.executable, WRITER, vault_file, "--ops", str(total_ops), "--shards", str(shards)],
+        stdout=subprocess.PIPE, text=True
+    )
+    output = []
+    try:
+        for line in proc.stdout:
+            output.append(line)
+            if line.startswith("ack ") and int(line.split()[1]) >= kill_after:
+                proc.kill()
+                break
+        output.extend(proc.stdout)
+    finally:
+        proc.kill()
+        proc.wait(timeout=30)
+    assert proc.returncode == -signal.SIGKILL
+    _assert_recovered(vault_file, shards, _acked("".join(output)), total_ops)
@@ -0,0 +1,39 @@
+import json
+
+from vault import PasswordVault
+
+
+def _legacy_vault(crypto_manager, path, credentials):
+    with open(path, "wb") as f:
+        f.write(crypto_manager.encrypt_data(json.dumps(credentials)))
+    vault = PasswordVault(crypto_manager, str(path), write_window=0)
+    vault.load_vault()
+    return vault
+
+
+def _ids(vault):
+    return {c.website: c.id for c in vault.credentials}
+
+
+def test_duplicate_ids_do_not_renumber_unique_records(crypto_manager, tmp_path):
+    vault = _legacy_vault(crypto_manager, tmp_path / "vault.enc", [
+        {"id": 1, "website": "a", "username": "u", "password": "p"},
+        {"id": 1, "website": "b", "username": "u", "password": "p"},
+        {"id": 2, "website": "c", "username": "u", "password": "p"},
+    ])
+    assert _ids(vault) == {"a": 1, "b": 3, "c": 2}
+    assert vault.next_id == 4
+
+
+def test_missing_ids_are_assigned_after_the_highest(crypto_manager, tmp_path):
+    path = tmp_path / "vault.enc"
+    vault = _legacy_vault(crypto_manager, path, [
+        {"website": "a", "username": "u", "password": "p"},
+        {"id": 5, "website": "b", "username": "u", "password": "p"},
+    ])
+    assert _ids(vault) == {"a": 6, "b": 5}
+
+    # La reparación se persiste: al recargar los ids no cambian
+    reloaded = PasswordVault(crypto_manager, str(path), write_window=0)
+    reloaded.load_vault()
+    assert _ids(reloaded) == {"a": 6, "b": 5}
@@ -0,0 +1,134 @@
+"""Proceso escritor para las pruebas de durabilidad del vault.
+
+Ejecuta una secuencia determinista de mutaciones e imprime "ack n" cada vez
+que la mutación n ya es durable (write_window=0). Con --crash-at, se mata a
+sí mismo con SIGKILL en medio de la llamada número N a la función indicada.
+"""
+import argparse
+import os
+import signal
+import sys
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import vault as vault_module  # noqa: E402
+from crypto_utils import CryptoManager  # noqa: E402
+from vault import PasswordVault  # noqa: E402
+
+MASTER_PASSWORD = "contraseña de pruebas"
+# Compactaciones frecuentes para que los cortes también caigan en ellas
+VAULT_OPTIONS = {"write_window": 0, "min_compaction_bytes": 1024, "compaction_ratio": 0.5, "reshard_threshold": None}
+
+
+def build_ops(count: int) -> List[Tuple]:
+    """Secuencia de mutaciones: altas, modificaciones y bajas intercaladas."""
+    ops = []
+    added, deleted = 0, 0
+    for i in range(count):
+        step = i % 4
+        if step in (0, 1):
+            added += 1
+            ops.append(("add", f"sitio{i}.com", f"usuario{i}", f"clave{i}"))
+        elif step == 2:
+            ops.append(("update", added, f"sitio{i}.com", f"usuario{i}", f"cambiada{i}"))
+        else:
+            deleted += 1
+            ops.append(("delete", deleted * 2 - 1))
+    return ops
+
+
+def expected_state(ops: List[Tuple]) -> Dict[int, Tuple[str, str, str]]:
+    """Contenido esperado del vault (id -> sitio, usuario, contraseña) tras aplicar ops."""
+    state = {}
+    next_id = 1
+    for op in ops:
+        if op[0] == "add":
+            state[next_id] = op[1:]
+            next_id += 1
+        elif op[0] == "update":
+            state[op[1]] = op[2:]
+        else:
+            state.pop(op[1], None)
+    return state
+
+
+def open_vault(vault_file: str, shards: int) -> PasswordVault:
+    crypto_manager = CryptoManager()
+    crypto_manager.initialize_encryption(MASTER_PASSWORD)
+    return PasswordVault(crypto_manager, vault_file, shards=shards, **VAULT_OPTIONS)
+
+
+def _kill_self() -> None:
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def inject_crash(target: str, call_number: int) -> None:
+    """Reemplaza una función de escritura del vault por una que muere en la llamada call_number."""
+    calls = 0
+
+    def durable_append(path, data):
+        nonlocal calls
+        calls += 1
+        if calls == call_number:
+            # Registro a medio escribir
+            with open(path, "ab") as f:
+                f.write(data[:len(data) // 2])
+                f.flush()
+                os.fsync(f.fileno())
+            _kill_self()
+        original(path, data)
+
+    def atomic_write_stream(path, chunks):
+        nonlocal calls
+        calls += 1
+        if calls == call_number:
+            # Instantánea, fragmento o manifiesto a medio escribir en el temporal
+            def torn():
+                yield next(iter(chunks))
+                _kill_self()
+            original(path, torn())
+        original(path, chunks)
+
+    def atomic_write(path, data):
+        nonlocal calls
+        calls += 1
+        if calls == call_number:
+            # Instantánea ya reemplazada, registro aún sin vaciar
+            _kill_self()
+        original(path, data)
+
+    replacement = {
+        "durable_append": durable_append,
+        "atomic_write_stream": atomic_write_stream,
+        "atomic_write": atomic_write,
+    }[target]
+    original = getattr(vault_module, target)
+    setattr(vault_module, target, replacement)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("vault_file")
+    parser.add_argument("--ops", type=int, default=200)
+    parser.add_argument("--shards", type=int, default=1)
+    parser.add_argument("--crash-in", choices=("durable_append", "atomic_write_stream", "atomic_write"))
+    parser.add_argument("--crash-at", type=int, default=0)
+    args = parser.parse_args()
+
+    vault = open_vault(args.vault_file, args.shards)
+    vault.load_vault()
+    if args.crash_in:
+        inject_crash(args.crash_in, args.crash_at)
+    for n, op in enumerate(build_ops(args.ops), start=1):
+        if op[0] == "add":
+            vault.add_credentials(*op[1:])
+        elif op[0] == "update":
+            vault.update_credentials(*op[1:])
+        else:
+            vault.delete_credentials(op[1])
+        print(f"ack {n}", flush=True)
+
+
+if __name__ == "__main__":
+    main()